@@ -2,15 +2,24 @@ from dotenv import load_dotenv
 load_dotenv()
 import json
 import os
+import re
 
-from flask import Flask
+from flask import Flask, current_app
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
-from sqlalchemy import inspect, text
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateIndex
 
 
-db = SQLAlchemy()
+# Deterministic foreign-key names so later migrations can drop and re-add
+# constraints by name instead of relying on dialect-generated ones.
+db = SQLAlchemy(
+    metadata=MetaData(
+        naming_convention={"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+    )
+)
 migrate = Migrate()
 login_manager = LoginManager()
 
@@ -101,6 +110,7 @@ def create_app(test_config=None):
     with app.app_context():
         db.create_all()
         _ensure_schema_extensions()
+        _ensure_indexes()
         _ensure_default_plans()
         print("⚠️ its on")
         _ensure_master_admin()  # temporarily disabled
@@ -131,13 +141,13 @@ def create_app(test_config=None):
         from flask import session
         from flask_login import current_user
         from .models import SubscriptionPlan
-        from .workspaces import get_accessible_workspaces
+        from .workspaces import get_accessible_workspaces_cached
 
         plans = SubscriptionPlan.query.order_by(SubscriptionPlan.tier.asc()).all()
         workspace_options = []
         active_workspace = None
         if current_user.is_authenticated:
-            workspace_options = get_accessible_workspaces(current_user)
+            workspace_options = get_accessible_workspaces_cached(current_user)
             stored_id = session.get("active_workspace_id")
             if stored_id:
                 active_workspace = next(
@@ -179,19 +189,43 @@ def create_app(test_config=None):
             print("Subscription plans already present.")
         print("Database ready.")
 
+    @app.cli.command("ensure-indexes")
+    def ensure_indexes_command():
+        """Back-fill model indexes; run once per deploy on Postgres."""
+
+        if db.engine.dialect.name != "postgresql":
+            _ensure_indexes()
+            print("Indexes ready.")
+            return
+
+        built, failed = _build_indexes_concurrently()
+        print(f"{built} index(es) in place, {failed} failed.")
+
     return app
 
 
 def _ensure_schema_extensions() -> None:
     inspector = inspect(db.engine)
     existing_tables = set(inspector.get_table_names())
+    migrations: list[str] = []
 
     if "users" in existing_tables:
         columns = {col["name"] for col in inspector.get_columns("users")}
-        migrations = []
         if "notification_preferences" not in columns:
+            from .models import DEFAULT_NOTIFICATION_PREFERENCES
+
+            # A constant default fills existing rows as part of the ALTER
+            # (metadata-only on Postgres 11+), so no UPDATE pass is needed.
+            default_json = json.dumps(DEFAULT_NOTIFICATION_PREFERENCES).replace("'", "''")
+            migrations.append(
+                "ALTER TABLE users ADD COLUMN notification_preferences TEXT "
+                f"DEFAULT '{default_json}'"
+            )
+        if "must_change_password" not in columns:
+            # A constant default fills existing rows without rewriting the
+            # table, so no separate backfill pass is needed.
             migrations.append(
-                "ALTER TABLE users ADD COLUMN notification_preferences TEXT"
+                "ALTER TABLE users ADD COLUMN must_change_password BOOLEAN NOT NULL DEFAULT FALSE"
             )
         if "two_factor_enabled" not in columns:
             migrations.append(
@@ -230,48 +264,38 @@ def _ensure_schema_extensions() -> None:
                 "ALTER TABLE users ADD COLUMN emergency_contact TEXT"
             )
 
-        if migrations:
-            with db.engine.begin() as conn:
-                for statement in migrations:
-                    conn.execute(text(statement))
-
-        if "notification_preferences" not in columns:
-            from .models import DEFAULT_NOTIFICATION_PREFERENCES
-
-            default_json = json.dumps(DEFAULT_NOTIFICATION_PREFERENCES)
-            with db.engine.begin() as conn:
-                conn.execute(
-                    text(
-                        "UPDATE users SET notification_preferences = :default WHERE notification_preferences IS NULL"
-                    ),
-                    {"default": default_json},
-                )
+    if "organizations" in existing_tables:
+        columns = {col["name"] for col in inspector.get_columns("organizations")}
+        if "report_data_version" not in columns:
+            migrations.append(
+                "ALTER TABLE organizations ADD COLUMN report_data_version INTEGER NOT NULL DEFAULT 0"
+            )
 
-        if "two_factor_enabled" not in columns:
-            with db.engine.begin() as conn:
-                conn.execute(
-                    text(
-                        "UPDATE users SET two_factor_enabled = 1 WHERE two_factor_enabled IS NULL"
-                    )
-                )
+    if "subscription_plans" in existing_tables:
+        columns = {col["name"] for col in inspector.get_columns("subscription_plans")}
+        additions = []
+        if "included_users" not in columns:
+            additions.append("ADD COLUMN included_users INTEGER")
+        if "extra_user_price" not in columns:
+            additions.append("ADD COLUMN extra_user_price NUMERIC(10,2)")
+        if additions:
+            if db.engine.dialect.name == "sqlite":
+                # SQLite accepts only one ADD COLUMN per ALTER TABLE.
+                migrations.extend(f"ALTER TABLE subscription_plans {clause}" for clause in additions)
+            else:
+                migrations.append("ALTER TABLE subscription_plans " + ", ".join(additions))
 
     if "api_keys" in existing_tables:
         columns = {col["name"] for col in inspector.get_columns("api_keys")}
-        migrations = []
         if "token_prefix" not in columns:
             migrations.append("ALTER TABLE api_keys ADD COLUMN token_prefix VARCHAR(16)")
         if "token_last4" not in columns:
             migrations.append("ALTER TABLE api_keys ADD COLUMN token_last4 VARCHAR(4)")
         if "revoked_at" not in columns:
             migrations.append("ALTER TABLE api_keys ADD COLUMN revoked_at DATETIME")
-        if migrations:
-            with db.engine.begin() as conn:
-                for statement in migrations:
-                    conn.execute(text(statement))
 
     if "commission_txns" in existing_tables:
         columns = {col["name"] for col in inspector.get_columns("commission_txns")}
-        migrations = []
         if "manual_amount" not in columns:
             migrations.append("ALTER TABLE commission_txns ADD COLUMN manual_amount NUMERIC(12,2)")
         if "manual_split_pct" not in columns:
@@ -282,10 +306,93 @@ def _ensure_schema_extensions() -> None:
             migrations.append("ALTER TABLE commission_txns ADD COLUMN override_applied_at DATETIME")
         if "override_applied_by" not in columns:
             migrations.append("ALTER TABLE commission_txns ADD COLUMN override_applied_by INTEGER")
-        if migrations:
-            with db.engine.begin() as conn:
-                for statement in migrations:
-                    conn.execute(text(statement))
+
+    if migrations:
+        # One transaction for every pending ALTER instead of one per table.
+        with db.engine.begin() as conn:
+            for statement in migrations:
+                conn.execute(text(statement))
+
+
+def _ensure_indexes() -> None:
+    """Create model-declared indexes missing from tables that predate them.
+
+    ``db.create_all`` only builds indexes alongside tables it creates, so
+    indexes added to existing models are back-filled here. Postgres is left to
+    ``flask ensure-indexes``, which builds them CONCURRENTLY once per deploy
+    rather than on every worker boot.
+    """
+
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        missing = _missing_postgres_indexes()
+        if missing:
+            current_app.logger.warning(
+                "Missing indexes %s; run `flask ensure-indexes` to build them.",
+                ", ".join(sorted(missing)),
+            )
+        return
+
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                if dialect == "sqlite":
+                    # SQLite doesn't reflect expression indexes, so checkfirst
+                    # would try to rebuild the lower() ones on every start.
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+                else:
+                    index.create(bind=conn, checkfirst=True)
+
+
+def _missing_postgres_indexes() -> set[str]:
+    declared = {index.name for table in db.metadata.sorted_tables for index in table.indexes}
+    with db.engine.connect() as conn:
+        return declared - _postgres_index_names(conn, valid=True)
+
+
+def _postgres_index_names(conn, *, valid: bool) -> set[str]:
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE i.indisvalid = :valid AND n.nspname = current_schema()"
+        ),
+        {"valid": valid},
+    )
+    return set(rows.scalars())
+
+
+def _build_indexes_concurrently() -> tuple[int, int]:
+    """Build missing Postgres indexes without blocking writes.
+
+    Returns ``(built, failed)``. Each index is attempted on its own so one
+    failure doesn't stop the rest.
+    """
+
+    declared = {index.name: index for table in db.metadata.sorted_tables for index in table.indexes}
+    built = failed = 0
+    # CONCURRENTLY refuses to run inside a transaction, hence AUTOCOMMIT.
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # An interrupted concurrent build leaves an INVALID index behind that
+        # IF NOT EXISTS would treat as done; drop those so they are rebuilt.
+        invalid = _postgres_index_names(conn, valid=False)
+        preparer = conn.dialect.identifier_preparer
+        for name, index in declared.items():
+            # Splice CONCURRENTLY into the compiled DDL rather than toggling
+            # the shared Index options other code paths read.
+            statement = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+            statement = re.sub(r"^CREATE (UNIQUE )?INDEX ", r"CREATE \1INDEX CONCURRENTLY ", statement)
+            try:
+                if name in invalid:
+                    conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {preparer.quote(name)}")
+                conn.exec_driver_sql(statement)
+            except SQLAlchemyError:
+                current_app.logger.exception("Failed to build index %s", name)
+                failed += 1
+            else:
+                built += 1
+    return built, failed
 
 
 def _seed_default_categories() -> None:
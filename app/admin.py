@@ -45,7 +45,11 @@ from .models import (
     WorkspaceMembership,
     OfficeMembership,
 )
-from .workspaces import get_accessible_workspaces, get_accessible_workspace_ids
+from .workspaces import (
+    get_accessible_workspace_ids,
+    get_accessible_workspaces,
+    get_accessible_workspaces_cached,
+)
 from .resend_email import send_workspace_invitation
 from .guides import get_role_guides, get_interactive_tour
 from .marketing import build_plan_details
@@ -130,7 +134,7 @@ def index():
         )
         plan_cards = build_plan_details(plans) if plans else []
     else:
-        workspaces = get_accessible_workspaces(current_user)
+        workspaces = get_accessible_workspaces_cached(current_user)
         unique_offices = {ws.office for ws in workspaces if ws and ws.office}
         offices = sorted(unique_offices, key=lambda o: o.name)
         users = [current_user]
@@ -376,10 +380,15 @@ def create_user():
             next=login_target,
             _external=True,
         )
+        invited_office = invited_workspace.office if invited_workspace else None
         send_workspace_invitation(
-            recipient=email,
-            inviter=current_user,
-            workspace=invited_workspace,
+            email,
+            inviter_email=current_user.email,
+            inviter_display=current_user.display_name_for_ui,
+            workspace_id=invited_workspace.id if invited_workspace else None,
+            workspace_name=invited_workspace.name if invited_workspace else None,
+            office_id=invited_office.id if invited_office else None,
+            office_name=invited_office.name if invited_office else None,
             role=role,
             temporary_password=temporary_password,
             login_url=login_url,
@@ -17,6 +17,7 @@ from flask_login import current_user, login_required, login_user, logout_user
 from . import db
 from .models import Organization, SubscriptionPlan, Subscription, User
 from .resend_email import (
+    resend_batch,
     send_login_notification,
     send_signup_alert,
     send_signup_welcome,
@@ -173,7 +174,9 @@ def signup_complete():
         return redirect(url_for("auth.login"))
 
     try:
-        session = stripe_gateway.retrieve_checkout_session(session_id)
+        session = stripe_gateway.retrieve_checkout_session(
+            session_id, expand=["subscription"]
+        )
     except Exception:
         current_app.logger.exception("Failed to retrieve Stripe checkout session")
         flash("We couldn't verify your payment. Email contact@trackyoursheets.com for assistance.", "danger")
@@ -244,13 +247,15 @@ def signup_complete():
 
     db.session.commit()
 
-    send_signup_welcome(user, org)
-    send_signup_alert(user, org)
+    with resend_batch():
+        send_signup_welcome(user, org)
+        send_signup_alert(user, org)
 
     if user.two_factor_enabled:
         code = user.generate_two_factor_code()
         db.session.commit()
-        send_two_factor_code_email(user.email, code, intent="signup")
+        if code:
+            send_two_factor_code_email(user.email, code, intent="signup")
         session["two_factor_user_id"] = user.id
         session["two_factor_intent"] = "signup"
         session["two_factor_after_signup"] = True
@@ -286,7 +291,8 @@ def login():
             if user.two_factor_enabled:
                 code = user.generate_two_factor_code()
                 db.session.commit()
-                send_two_factor_code_email(user.email, code, intent="login")
+                if code:
+                    send_two_factor_code_email(user.email, code, intent="login")
                 session["two_factor_user_id"] = user.id
                 session["two_factor_intent"] = "login"
                 session["two_factor_next"] = request.args.get("next")
@@ -405,9 +411,12 @@ def resend_two_factor():
 
     code = user.generate_two_factor_code()
     db.session.commit()
-    intent = session.get("two_factor_intent", "login")
-    send_two_factor_code_email(user.email, code, intent=intent)
-    flash("We've sent a fresh verification code to your email.", "info")
+    if code:
+        intent = session.get("two_factor_intent", "login")
+        send_two_factor_code_email(user.email, code, intent=intent)
+        flash("We've sent a fresh verification code to your email.", "info")
+    else:
+        flash("We just sent you a code. Check your inbox before requesting another.", "info")
     return redirect(url_for("auth.two_factor"))
 
 
@@ -442,10 +451,13 @@ def update_two_factor_email():
         flash("That email is already registered. Try another.", "danger")
         return redirect(url_for("auth.two_factor"))
 
+    # The outstanding code went to the old address, so always issue a new one.
+    email_changed = user.email != new_email
     user.email = new_email
-    code = user.generate_two_factor_code()
+    code = user.generate_two_factor_code(force=email_changed)
     db.session.commit()
-    send_two_factor_code_email(user.email, code, intent="signup")
+    if code:
+        send_two_factor_code_email(user.email, code, intent="signup")
     flash("Updated your email and sent a new verification code.", "success")
     return redirect(url_for("auth.two_factor"))
 
@@ -463,8 +475,11 @@ def password_change_verify():
         if request.form.get("intent") == "resend":
             code = current_user.generate_two_factor_code()
             db.session.commit()
-            send_two_factor_code_email(current_user.email, code, intent="password_change")
-            flash("We've sent a fresh verification code to your email.", "info")
+            if code:
+                send_two_factor_code_email(current_user.email, code, intent="password_change")
+                flash("We've sent a fresh verification code to your email.", "info")
+            else:
+                flash("We just sent you a code. Check your inbox before requesting another.", "info")
             return redirect(url_for("auth.password_change_verify"))
 
         code = request.form.get("code")
@@ -274,11 +274,11 @@ def _normalise(value: str | None) -> str:
     return (value or "").strip().lower()
 
 
-def _next_anniversary(original: datetime | None) -> date | None:
+def _next_anniversary(original: datetime | None, today: date | None = None) -> date | None:
     if not original:
         return None
     base = original.date()
-    today = datetime.utcnow().date()
+    today = today or datetime.utcnow().date()
     try:
         anniversary = date(today.year, base.month, base.day)
     except ValueError:
@@ -400,11 +400,13 @@ def dashboard():
     recent_window = datetime.utcnow() - timedelta(days=45)
     recent_hires = [user for user in employees if user.created_at and user.created_at >= recent_window]
     upcoming_anniversaries = []
+    today = datetime.utcnow().date()
+    anniversary_cutoff = today + timedelta(days=90)
     for employee in employees:
-        anniversary = _next_anniversary(employee.created_at)
+        anniversary = _next_anniversary(employee.created_at, today)
         if not anniversary:
             continue
-        if anniversary <= datetime.utcnow().date() + timedelta(days=90):
+        if anniversary <= anniversary_cutoff:
             upcoming_anniversaries.append({
                 "user": employee,
                 "anniversary": anniversary,
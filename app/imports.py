@@ -30,11 +30,11 @@ from .models import (
     CategoryTag,
     Workspace,
 )
-from .resend_email import send_import_notification
+from .resend_email import canonical_email_key, send_import_notification
 from .workspaces import (
     find_workspace_for_upload,
-    get_accessible_workspaces,
-    get_accessible_workspace_ids,
+    get_accessible_workspaces_cached,
+    get_accessible_workspace_ids_cached,
     get_accessible_producers,
     user_can_access_workspace,
 )
@@ -44,17 +44,12 @@ imports_bp = Blueprint("imports", __name__)
 
 
 def _dedupe_emails(emails):
-    seen = set()
-    unique = []
+    unique = {}
     for email in emails:
-        if not email:
-            continue
-        key = email.lower()
-        if key in seen:
-            continue
-        seen.add(key)
-        unique.append(email)
-    return unique
+        key = canonical_email_key(email)
+        if key and key not in unique:
+            unique[key] = email
+    return list(unique.values())
 
 
 def _import_notification_recipients(workspace, uploader):
@@ -99,8 +94,8 @@ def _allowed_file(filename: str) -> bool:
 @imports_bp.route("/")
 @login_required
 def index():
-    workspaces = get_accessible_workspaces(current_user)
-    workspace_ids = get_accessible_workspace_ids(current_user)
+    workspaces = get_accessible_workspaces_cached(current_user)
+    workspace_ids = get_accessible_workspace_ids_cached(current_user)
 
     if workspace_ids:
         batch_query = ImportBatch.query.filter_by(org_id=current_user.org_id)
@@ -196,7 +191,7 @@ def detail(batch_id: int):
 @imports_bp.route("/manual", methods=["GET", "POST"])
 @login_required
 def manual_entry():
-    workspaces = get_accessible_workspaces(current_user)
+    workspaces = get_accessible_workspaces_cached(current_user)
     if not workspaces:
         flash("Assign yourself to a workspace before adding manual transactions.", "warning")
         return redirect(url_for("imports.index"))
@@ -419,10 +414,14 @@ def upload():
 
     recipients = _import_notification_recipients(workspace, current_user)
     if recipients:
+        office = workspace.office
         send_import_notification(
-            recipients=recipients,
-            workspace=workspace,
-            uploader=current_user,
+            recipients,
+            workspace_id=workspace.id,
+            workspace_name=workspace.name,
+            office_name=office.name if office else None,
+            uploader_email=current_user.email,
+            uploader_name=current_user.display_name_for_ui,
             period=derived_period,
             summary=summary,
         )
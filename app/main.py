@@ -23,7 +23,7 @@ from flask import (
 )
 from flask_login import current_user, login_required
 
-from sqlalchemy import func, or_
+from sqlalchemy import case, func, or_
 from sqlalchemy.orm import joinedload
 
 from werkzeug.security import generate_password_hash
@@ -51,9 +51,14 @@ from .models import (
     DEFAULT_NOTIFICATION_PREFERENCES,
 )
 from .guides import get_role_guides, get_interactive_tour
-from .workspaces import get_accessible_workspace_ids, get_accessible_workspaces, user_can_access_workspace
+from .workspaces import (
+    get_accessible_workspace_ids_cached,
+    get_accessible_workspaces_cached,
+    user_can_access_workspace,
+)
 from . import db
 from .resend_email import (
+    canonical_email_key,
     send_notification_email,
     send_two_factor_code_email,
     send_workspace_chat_notification,
@@ -119,17 +124,12 @@ def _note_meta(note):
 
 
 def _dedupe_emails(emails: Sequence[str]) -> list[str]:
-    seen: set[str] = set()
-    unique: list[str] = []
+    unique: dict[str, str] = {}
     for email in emails:
-        if not email:
-            continue
-        key = email.lower()
-        if key in seen:
-            continue
-        seen.add(key)
-        unique.append(email)
-    return unique
+        key = canonical_email_key(email)
+        if key and key not in unique:
+            unique[key] = email
+    return list(unique.values())
 
 
 def _billing_contacts(organization) -> list[str]:
@@ -183,35 +183,37 @@ def _calculate_premium_totals(
     start_of_quarter = date(today.year, quarter_index * 3 + 1, 1)
     start_of_year = date(today.year, 1, 1)
 
-    def _sum_since(start_date: date | None) -> float:
-        query = CommissionTransaction.query.filter_by(org_id=org_id)
-        if workspace_ids:
-            query = query.filter(
-                or_(
-                    CommissionTransaction.workspace_id.in_(workspace_ids),
-                    CommissionTransaction.batch.has(
-                        ImportBatch.workspace_id.in_(workspace_ids)
-                    ),
-                )
+    query = CommissionTransaction.query.filter_by(org_id=org_id)
+    if workspace_ids:
+        query = query.filter(
+            or_(
+                CommissionTransaction.workspace_id.in_(workspace_ids),
+                CommissionTransaction.batch.has(
+                    ImportBatch.workspace_id.in_(workspace_ids)
+                ),
             )
-        if start_date:
-            query = query.filter(CommissionTransaction.txn_date >= start_date)
-        total = (
-            query.with_entities(
-                func.coalesce(func.sum(CommissionTransaction.premium), 0)
-            ).scalar()
-            or 0
         )
-        return float(total)
 
-    return {
-        "all": _sum_since(None),
-        "today": _sum_since(today),
-        "week": _sum_since(start_of_week),
-        "month": _sum_since(start_of_month),
-        "quarter": _sum_since(start_of_quarter),
-        "year": _sum_since(start_of_year),
+    periods = {
+        "all": None,
+        "today": today,
+        "week": start_of_week,
+        "month": start_of_month,
+        "quarter": start_of_quarter,
+        "year": start_of_year,
     }
+    premium = func.coalesce(CommissionTransaction.premium, 0)
+    totals = query.with_entities(
+        *(
+            func.sum(
+                premium
+                if start_date is None
+                else case((CommissionTransaction.txn_date >= start_date, premium), else_=0)
+            )
+            for start_date in periods.values()
+        )
+    ).one()
+    return {key: float(total or 0) for key, total in zip(periods, totals)}
 
 
 def _render_chat_message_html(message: WorkspaceChatMessage) -> Markup:
@@ -434,8 +436,8 @@ def dashboard():
         )
 
     org_id = current_user.org_id
-    workspace_ids = get_accessible_workspace_ids(current_user)
-    workspaces = get_accessible_workspaces(current_user)
+    workspace_ids = get_accessible_workspace_ids_cached(current_user)
+    workspaces = get_accessible_workspaces_cached(current_user)
 
     def _apply_workspace_scope(query):
         if workspace_ids:
@@ -879,11 +881,12 @@ def settings():
             elif pending_password_hash:
                 code = current_user.generate_two_factor_code()
                 db.session.commit()
-                send_two_factor_code_email(
-                    current_user.email,
-                    code,
-                    intent="password_change",
-                )
+                if code:
+                    send_two_factor_code_email(
+                        current_user.email,
+                        code,
+                        intent="password_change",
+                    )
                 session["password_change"] = {
                     "user_id": current_user.id,
                     "password_hash": pending_password_hash,
@@ -1120,7 +1123,7 @@ def settings():
     seats_remaining = None
     if included_seats is not None:
         seats_remaining = max(included_seats - usage_snapshot["users"], 0)
-    accessible_workspaces = get_accessible_workspaces(current_user)
+    accessible_workspaces = get_accessible_workspaces_cached(current_user)
     joined_workspace_ids = {ws.id for ws in accessible_workspaces}
     all_workspaces = (
         Workspace.query.filter_by(org_id=org.id)
@@ -1369,7 +1372,9 @@ def checkout_complete():
         return redirect(url_for("main.settings"))
 
     try:
-        session = stripe_gateway.retrieve_checkout_session(session_id)
+        session = stripe_gateway.retrieve_checkout_session(
+            session_id, expand=["subscription", "line_items"]
+        )
     except Exception:
         current_app.logger.exception("Failed to retrieve Stripe checkout session")
         flash("We couldn't verify the Stripe checkout session. Email contact@trackyoursheets.com for assistance.", "danger")
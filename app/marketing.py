@@ -88,21 +88,24 @@ def build_plan_details(
         except RuntimeError:  # pragma: no cover - accessing outside app context
             stripe_gateway = None
 
+    plans = list(plans)
+    stripe_pricing = {}
+    if stripe_gateway and getattr(stripe_gateway, "is_configured", False):
+        stripe_pricing = stripe_gateway.plan_pricing_bulk(plans)
+
     plan_details: list[dict] = []
     for index, plan in enumerate(plans):
         price_label = _format_currency(plan.price_per_user)
         billing_interval = "month"
         price_amount: Optional[float] = float(plan.price_per_user or 0)
         price_source = "database"
-        if stripe_gateway and getattr(stripe_gateway, "is_configured", False):
-            pricing_snapshot = stripe_gateway.plan_pricing(plan)
-            if pricing_snapshot and pricing_snapshot.get("label"):
-                price_label = pricing_snapshot["label"]
-                billing_interval = pricing_snapshot.get("interval") or billing_interval
-                amount_decimal = pricing_snapshot.get("amount_decimal")
-                if amount_decimal is not None:
-                    price_amount = float(amount_decimal)
-                price_source = "stripe"
+        pricing_snapshot = stripe_pricing.get(plan.name.lower())
+        if pricing_snapshot and pricing_snapshot.label:
+            price_label = pricing_snapshot.label
+            billing_interval = pricing_snapshot.interval or billing_interval
+            if pricing_snapshot.amount_decimal is not None:
+                price_amount = float(pricing_snapshot.amount_decimal)
+            price_source = "stripe"
         plan_details.append(
             {
                 "id": plan.id,
@@ -18,6 +18,11 @@ DEFAULT_NOTIFICATION_PREFERENCES = {
     "general_updates": True,
 }
 
+TWO_FACTOR_CODE_TTL = timedelta(minutes=10)
+# A double-submitted form reuses the challenge issued moments ago instead of
+# replacing the code its email is already carrying.
+TWO_FACTOR_REISSUE_INTERVAL = timedelta(seconds=30)
+
 
 class TimestampMixin:
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -32,6 +37,8 @@ class Organization(TimestampMixin, db.Model):
     plan_id = db.Column(db.Integer, db.ForeignKey("subscription_plans.id"))
     stripe_customer_id = db.Column(db.String(120))
     trial_ends_at = db.Column(db.DateTime)
+    # Bumped whenever report data changes; see reports._bump_report_data_version.
+    report_data_version = db.Column(db.Integer, nullable=False, default=0)
 
     users = db.relationship("User", backref="organization", lazy=True)
     offices = db.relationship("Office", backref="organization", lazy=True)
@@ -70,6 +77,21 @@ class SubscriptionPlan(db.Model):
 
     organizations = db.relationship("Organization", backref="plan", lazy=True)
 
+    __table_args__ = (
+        db.CheckConstraint(
+            "included_users IS NULL OR included_users >= 0",
+            name="ck_subscription_plans_included_users_nonneg",
+        ),
+        db.CheckConstraint(
+            "extra_user_price IS NULL OR extra_user_price >= 0",
+            name="ck_subscription_plans_extra_user_price_nonneg",
+        ),
+    )
+
+
+# Checkout callbacks resolve plans by case-insensitive name.
+db.Index("ix_subscription_plans_name_lower", db.func.lower(SubscriptionPlan.name))
+
 
 class Office(TimestampMixin, db.Model):
     __tablename__ = "offices"
@@ -114,23 +136,51 @@ class OfficeMembership(TimestampMixin, db.Model):
     __tablename__ = "office_memberships"
 
     id = db.Column(db.Integer, primary_key=True)
-    org_id = db.Column(db.Integer, db.ForeignKey("organizations.id"), nullable=False)
-    office_id = db.Column(db.Integer, db.ForeignKey("offices.id"), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    org_id = db.Column(db.Integer, db.ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
+    office_id = db.Column(db.Integer, db.ForeignKey("offices.id", ondelete="CASCADE"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     role = db.Column(db.String(32))
 
+    # (org_id, user_id) matches "this user's memberships in this org" and
+    # still serves org-only lookups.
+    __table_args__ = (
+        db.Index("ix_office_memberships_org_user", "org_id", "user_id"),
+        db.Index("ix_office_memberships_office_id", "office_id"),
+        db.Index("ix_office_memberships_user_id", "user_id"),
+    )
+
 
 class WorkspaceMembership(TimestampMixin, db.Model):
     __tablename__ = "workspace_memberships"
 
     id = db.Column(db.Integer, primary_key=True)
-    org_id = db.Column(db.Integer, db.ForeignKey("organizations.id"), nullable=False)
+    org_id = db.Column(db.Integer, db.ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
     workspace_id = db.Column(
-        db.Integer, db.ForeignKey("workspaces.id"), nullable=False
+        db.Integer, db.ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False
     )
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     role = db.Column(db.String(32))
 
+    # The (org_id, workspace_id) index also serves org-only lookups.
+    __table_args__ = (
+        db.Index("ix_workspace_memberships_org_workspace", "org_id", "workspace_id"),
+        db.Index("ix_workspace_memberships_workspace_id", "workspace_id"),
+        db.Index("ix_workspace_memberships_user_id", "user_id"),
+        db.Index(
+            "ix_workspace_memberships_org_user",
+            "org_id",
+            "user_id",
+            postgresql_include=["role"],
+        ),
+        db.Index(
+            "ix_workspace_memberships_role",
+            "workspace_id",
+            "role",
+            postgresql_where=db.text("role IS NOT NULL"),
+            sqlite_where=db.text("role IS NOT NULL"),
+        ),
+    )
+
 
 class User(UserMixin, TimestampMixin, db.Model):
     __tablename__ = "users"
@@ -246,10 +296,25 @@ class User(UserMixin, TimestampMixin, db.Model):
         selected = {key: (key in categories) for key in allowed}
         self.notification_preferences = selected
 
-    def generate_two_factor_code(self) -> str:
+    def generate_two_factor_code(self, *, force: bool = False) -> str | None:
+        """Start a new challenge and return its code.
+
+        Returns ``None`` when a challenge was issued within
+        ``TWO_FACTOR_REISSUE_INTERVAL``; its email is already on the way and
+        a new code would invalidate it. ``force`` always issues a new code.
+        """
+
+        now = datetime.utcnow()
+        if (
+            not force
+            and self.two_factor_secret
+            and self.two_factor_expires_at
+            and self.two_factor_expires_at - TWO_FACTOR_CODE_TTL + TWO_FACTOR_REISSUE_INTERVAL > now
+        ):
+            return None
         code = f"{randbelow(1_000_000):06d}"
         self.two_factor_secret = generate_password_hash(code)
-        self.two_factor_expires_at = datetime.utcnow() + timedelta(minutes=10)
+        self.two_factor_expires_at = now + TWO_FACTOR_CODE_TTL
         return code
 
     def verify_two_factor_code(self, candidate: str | None) -> bool:
@@ -495,6 +560,35 @@ class CommissionTransaction(TimestampMixin, db.Model):
         cascade="all, delete-orphan",
     )
 
+    __table_args__ = (
+        db.Index("ix_commission_txns_org_date", "org_id", "txn_date"),
+        db.Index(
+            "ix_commission_txns_org_workspace_date", "org_id", "workspace_id", "txn_date"
+        ),
+        db.Index(
+            "ix_commission_txns_org_producer_date", "org_id", "producer_id", "txn_date"
+        ),
+    )
+
+
+# Analytics filters compare ``lower(column)`` so expression indexes keep them
+# index-backed on both SQLite and Postgres.
+db.Index(
+    "ix_commission_txns_org_category_lower",
+    CommissionTransaction.org_id,
+    db.func.lower(CommissionTransaction.category),
+)
+db.Index(
+    "ix_commission_txns_org_product_type_lower",
+    CommissionTransaction.org_id,
+    db.func.lower(CommissionTransaction.product_type),
+)
+db.Index(
+    "ix_commission_txns_org_status_lower",
+    CommissionTransaction.org_id,
+    db.func.lower(CommissionTransaction.status),
+)
+
 
 class CommissionOverride(TimestampMixin, db.Model):
     __tablename__ = "commission_overrides"
@@ -1,10 +1,15 @@
 import csv
-from collections import defaultdict
-from datetime import datetime
-from io import BytesIO, StringIO
+import hashlib
+import threading
+import time
+from datetime import date, datetime
+from functools import lru_cache
+from tempfile import SpooledTemporaryFile
+from io import BytesIO, TextIOWrapper
 
 from flask import (
     Blueprint,
+    Response,
     abort,
     flash,
     jsonify,
@@ -12,99 +17,177 @@ from flask import (
     render_template,
     request,
     send_file,
+    stream_with_context,
     url_for,
 )
 from flask_login import current_user, login_required
-from sqlalchemy import func, or_
+from sqlalchemy import Numeric, String, case, cast, event, func, or_, update
+from sqlalchemy.orm import aliased, joinedload, object_session
+from werkzeug.utils import secure_filename
 
 from . import db
 from .models import (
+    Carrier,
     CommissionTransaction,
     ImportBatch,
+    Organization,
     PayoutStatement,
+    Policy,
     Producer,
     Workspace,
     CategoryTag,
 )
-from .workspaces import get_accessible_producers, get_accessible_workspace_ids
+from .workspaces import (
+    get_accessible_producers_cached,
+    get_accessible_workspace_ids_cached,
+)
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
 
 reports_bp = Blueprint("reports", __name__)
 
+_STREAM_BATCH_SIZE = 1000
+_CSV_CHUNK_SIZE = 64 * 1024
+_COPY_SPOOL_SIZE = 8 * 1024 * 1024
+
+_PDF_MAX_ROWS = 200
+_PDF_CACHE_TTL = 300
+_PDF_CACHE_MAX_ENTRIES = 64
+_pdf_cache = {}
+_pdf_cache_lock = threading.Lock()
+
+_STATUS_TAG_CACHE_TTL = 60
+_status_tag_cache = {}
+_status_tag_cache_lock = threading.Lock()
+
+_BRAND_BLUE = colors.HexColor("#2A4BFF")
+_PDF_CONTENT_WIDTH = letter[0] - 1.5 * inch
+_PDF_HEADER_ROW_HEIGHT = 0.26 * inch
+_PDF_ROW_HEIGHT = 0.22 * inch
+# Sized so dates, splits, statuses and the Commission header still fit whole
+# in the nine-column commission sheet; free text is clipped to fit.
+_PDF_COLUMN_WEIGHTS = {
+    "date": 1.15,
+    "split": 0.92,
+    "sales": 0.7,
+    "status": 0.92,
+    "commission": 1.45,
+}
+_PDF_CELL_PADDING = 3
+_PDF_HEADER_FONT = ("Helvetica-Bold", 10)
+_PDF_BODY_FONT = ("Helvetica", 9)
+
+_PARAGRAPH_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+_STYLES = getSampleStyleSheet()
+_HEADER_STYLE = ParagraphStyle(
+    "ReportHeader",
+    parent=_STYLES["Heading1"],
+    fontSize=22,
+    leading=28,
+    textColor=_BRAND_BLUE,
+)
+_SUBTITLE_STYLE = ParagraphStyle(
+    "ReportSubtitle",
+    parent=_STYLES["Heading2"],
+    fontSize=14,
+    leading=18,
+)
+
+_SUMMARY_TABLE_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, 0), _BRAND_BLUE),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("ALIGN", (0, 0), (-1, 0), "LEFT"),
+        ("ALIGN", (1, 1), (1, -1), "RIGHT"),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.whitesmoke, colors.white]),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+        ("FONTSIZE", (0, 0), (-1, 0), 11),
+    ]
+)
+_REPORT_TABLE_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, 0), _BRAND_BLUE),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("FONTNAME", (0, 0), (-1, 0), _PDF_HEADER_FONT[0]),
+        ("FONTSIZE", (0, 0), (-1, 0), _PDF_HEADER_FONT[1]),
+        ("FONTNAME", (0, 1), (-1, -1), _PDF_BODY_FONT[0]),
+        ("FONTSIZE", (0, 1), (-1, -1), _PDF_BODY_FONT[1]),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.whitesmoke, colors.white]),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+        ("ALIGN", (0, 0), (-1, 0), "LEFT"),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("LEFTPADDING", (0, 0), (-1, -1), _PDF_CELL_PADDING),
+        ("RIGHTPADDING", (0, 0), (-1, -1), _PDF_CELL_PADDING),
+    ]
+)
+
 
 @reports_bp.route("/")
 @login_required
 def overview():
     org_id = current_user.org_id
-    workspace_ids = get_accessible_workspace_ids(current_user)
-    carrier_totals = defaultdict(lambda: {"premium": 0.0, "commission": 0.0})
-    producer_totals = defaultdict(lambda: {"premium": 0.0, "commission": 0.0})
-    category_totals = defaultdict(lambda: {"premium": 0.0, "commission": 0.0})
-    txn_query = CommissionTransaction.query.filter_by(org_id=org_id)
+    workspace_ids = get_accessible_workspace_ids_cached(current_user)
+    txn_query = _txn_base_query(org_id, workspace_ids)
     if workspace_ids:
-        txn_query = txn_query.filter(
-            or_(
-                CommissionTransaction.workspace_id.in_(workspace_ids),
-                CommissionTransaction.batch.has(ImportBatch.workspace_id.in_(workspace_ids)),
+        carrier_key = func.coalesce(
+            func.nullif(CommissionTransaction.carrier_name, ""),
+            Carrier.name,
+            "Unassigned",
+        )
+        carrier_totals = _sum_by(
+            txn_query.outerjoin(Policy, Policy.id == CommissionTransaction.policy_id)
+            .outerjoin(Carrier, Carrier.id == Policy.carrier_id),
+            carrier_key,
+        )
+        producer_totals = _sum_by(
+            txn_query.outerjoin(Producer, Producer.id == CommissionTransaction.producer_id),
+            func.coalesce(Producer.display_name, "Unassigned"),
+        )
+        category_totals = _sum_by(
+            txn_query,
+            func.coalesce(func.nullif(CommissionTransaction.category, ""), "raw"),
+        )
+        recent_transactions = (
+            txn_query.options(
+                joinedload(CommissionTransaction.producer),
+                joinedload(CommissionTransaction.policy).joinedload(Policy.carrier),
             )
+            .order_by(CommissionTransaction.txn_date.desc())
+            .limit(25)
+            .all()
         )
-        transactions = txn_query.all()
     else:
-        transactions = []
-
-    for txn in transactions:
-        carrier = (
-            txn.carrier_name
-            or (txn.policy.carrier.name if txn.policy and txn.policy.carrier else "Unassigned")
-        )
-        producer_name = txn.producer.display_name if txn.producer else "Unassigned"
-        category = txn.category or "raw"
-        carrier_totals[carrier]["premium"] += float(txn.premium or 0)
-        carrier_totals[carrier]["commission"] += float(txn.amount or 0)
-        producer_totals[producer_name]["premium"] += float(txn.premium or 0)
-        producer_totals[producer_name]["commission"] += float(txn.amount or 0)
-        category_totals[category]["premium"] += float(txn.premium or 0)
-        category_totals[category]["commission"] += float(txn.amount or 0)
+        carrier_totals = producer_totals = category_totals = []
+        recent_transactions = []
 
     carrier_rows = [
-        {
-            "carrier": carrier,
-            "premium": totals["premium"],
-            "commission": totals["commission"],
-        }
-        for carrier, totals in carrier_totals.items()
+        {"carrier": carrier, "premium": premium, "commission": commission}
+        for carrier, premium, commission in carrier_totals
     ]
 
     producer_rows = [
-        {
-            "producer": producer,
-            "premium": totals["premium"],
-            "commission": totals["commission"],
-        }
-        for producer, totals in producer_totals.items()
+        {"producer": producer, "premium": premium, "commission": commission}
+        for producer, premium, commission in producer_totals
     ]
 
     category_rows = [
-        {
-            "category": category,
-            "premium": totals["premium"],
-            "commission": totals["commission"],
-        }
-        for category, totals in category_totals.items()
+        {"category": category, "premium": premium, "commission": commission}
+        for category, premium, commission in category_totals
     ]
 
-    recent_transactions = sorted(
-        transactions,
-        key=lambda txn: txn.txn_date or datetime.utcnow().date(),
-        reverse=True,
-    )[:25]
-
     statement_query = PayoutStatement.query.filter_by(org_id=org_id)
     batch_query = ImportBatch.query.filter_by(org_id=org_id)
     if workspace_ids:
@@ -122,7 +205,7 @@ def overview():
 
     can_assign_producers = current_user.role in {"owner", "admin"}
     assignable_producers = (
-        get_accessible_producers(current_user) if can_assign_producers else []
+        get_accessible_producers_cached(current_user) if can_assign_producers else []
     )
 
     return render_template(
@@ -142,7 +225,7 @@ def overview():
 @reports_bp.route("/analytics")
 @login_required
 def analytics_dashboard():
-    workspace_ids = get_accessible_workspace_ids(current_user)
+    workspace_ids = get_accessible_workspace_ids_cached(current_user)
 
     category_tags = _fetch_status_categories(current_user.org_id)
 
@@ -168,17 +251,18 @@ def analytics_dashboard():
 @login_required
 def analytics_data():
     dataset = _build_analytics_dataset(request.args, include_rows=True)
+    if orjson is not None:
+        return Response(orjson.dumps(dataset), mimetype="application/json")
     return jsonify(dataset)
 
 
 @reports_bp.route("/analytics/export")
 @login_required
 def analytics_export():
-    dataset = _build_analytics_dataset(request.args, include_rows=True)
     fmt = (request.args.get("format") or "csv").lower()
     filename = "analytics_report"
 
-    dataset["columns"] = [
+    columns = [
         {"key": "date", "label": "Date"},
         {"key": "producer", "label": "Producer"},
         {"key": "workspace", "label": "Workspace"},
@@ -190,7 +274,15 @@ def analytics_export():
     ]
 
     if fmt == "pdf":
-        pdf_bytes = _build_pdf_report("Analytics summary", dataset)
+        def build_pdf():
+            dataset = _build_analytics_dataset(
+                request.args, include_rows=True, row_limit=_PDF_MAX_ROWS
+            )
+            dataset["columns"] = columns
+            dataset["total_rows"] = dataset["summary"]["count"]
+            return _build_pdf_report("Analytics summary", dataset)
+
+        pdf_bytes = _cached_pdf(build_pdf)
         return send_file(
             BytesIO(pdf_bytes),
             mimetype="application/pdf",
@@ -198,9 +290,9 @@ def analytics_export():
             download_name=f"{filename}.pdf",
         )
 
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(
+    dataset = _build_analytics_dataset(request.args, include_rows=True)
+    return _csv_response(
+        filename,
         [
             "Date",
             "Producer",
@@ -210,10 +302,8 @@ def analytics_export():
             "Premium",
             "Commission",
             "Status",
-        ]
-    )
-    for row in dataset.get("table", []):
-        writer.writerow(
+        ],
+        (
             [
                 row.get("date"),
                 row.get("producer"),
@@ -224,13 +314,8 @@ def analytics_export():
                 f"{row.get('commission', 0):.2f}",
                 row.get("status"),
             ]
-        )
-    output.seek(0)
-    return send_file(
-        BytesIO(output.getvalue().encode("utf-8")),
-        mimetype="text/csv",
-        as_attachment=True,
-        download_name=f"{filename}.csv",
+            for row in dataset.get("table", [])
+        ),
     )
 
 
@@ -240,7 +325,7 @@ def commission_sheet():
     producer_id = request.args.get("producer_id", type=int)
     fmt = (request.args.get("format") or "csv").lower()
 
-    workspace_ids = get_accessible_workspace_ids(current_user)
+    workspace_ids = get_accessible_workspace_ids_cached(current_user)
 
     producer = None
     if producer_id:
@@ -250,25 +335,13 @@ def commission_sheet():
         if current_user.role == "agent" and workspace_ids and producer.workspace_id not in workspace_ids:
             abort(403)
 
-    query = CommissionTransaction.query.filter_by(org_id=current_user.org_id)
-    if workspace_ids:
-        query = query.filter(
-            or_(
-                CommissionTransaction.workspace_id.in_(workspace_ids),
-                CommissionTransaction.batch.has(ImportBatch.workspace_id.in_(workspace_ids)),
-            )
-        )
+    query = _txn_base_query(current_user.org_id, workspace_ids)
     if producer:
         query = query.filter(CommissionTransaction.producer_id == producer.id)
 
-    transactions = query.order_by(CommissionTransaction.txn_date.asc()).all()
-
-    table_rows = [_commission_row(txn) for txn in transactions]
-    summary = {
-        "commission": sum(float(txn.amount or 0) for txn in transactions),
-        "premium": sum(float(txn.premium or 0) for txn in transactions),
-        "count": len(transactions),
-    }
+    ordered = _commission_row_query(query).order_by(
+        CommissionTransaction.txn_date.asc()
+    )
 
     columns = [
         {"key": "date", "label": "Date"},
@@ -298,14 +371,22 @@ def commission_sheet():
         else "commission_sheet_all"
     )
 
-    dataset = {
-        "table": table_rows,
-        "summary": summary,
-        "columns": columns,
-    }
-
     if fmt == "pdf":
-        pdf_bytes = _build_pdf_report(title, dataset)
+        def build_pdf():
+            summary = _summary_totals(query)
+            link_prefix = _activity_link_prefix()
+            dataset = {
+                "table": [
+                    _commission_row_from_row(row, link_prefix)
+                    for row in ordered.limit(_PDF_MAX_ROWS)
+                ],
+                "summary": summary,
+                "total_rows": summary["count"],
+                "columns": columns,
+            }
+            return _build_pdf_report(title, dataset)
+
+        pdf_bytes = _cached_pdf(build_pdf)
         return send_file(
             BytesIO(pdf_bytes),
             mimetype="application/pdf",
@@ -313,22 +394,16 @@ def commission_sheet():
             download_name=f"{filename}.pdf",
         )
 
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow([column["label"] for column in columns])
-    for row in table_rows:
-        writer.writerow(
-            [
-                _format_csv_value(row, column)
-                for column in columns
-            ]
+    if db.engine.dialect.name == "postgresql":
+        return _copy_csv_response(
+            filename,
+            _commission_copy_query(query).order_by(CommissionTransaction.txn_date.asc()),
         )
-    output.seek(0)
-    return send_file(
-        BytesIO(output.getvalue().encode("utf-8")),
-        mimetype="text/csv",
-        as_attachment=True,
-        download_name=f"{filename}.csv",
+
+    return _csv_response(
+        filename,
+        [column["label"] for column in columns],
+        map(_commission_csv_values, ordered.yield_per(_STREAM_BATCH_SIZE)),
     )
 
 
@@ -338,7 +413,7 @@ def production_summary():
     fmt = (request.args.get("format") or "csv").lower()
     producer_id = request.args.get("producer_id", type=int)
 
-    workspace_ids = get_accessible_workspace_ids(current_user)
+    workspace_ids = get_accessible_workspace_ids_cached(current_user)
 
     producer = None
     if producer_id:
@@ -353,54 +428,45 @@ def production_summary():
         ):
             abort(403)
 
-    query = CommissionTransaction.query.filter_by(org_id=current_user.org_id)
-    if workspace_ids:
-        query = query.filter(
-            or_(
-                CommissionTransaction.workspace_id.in_(workspace_ids),
-                CommissionTransaction.batch.has(ImportBatch.workspace_id.in_(workspace_ids)),
-            )
-        )
+    query = _txn_base_query(current_user.org_id, workspace_ids)
     if producer:
         query = query.filter(CommissionTransaction.producer_id == producer.id)
 
-    transactions = query.order_by(CommissionTransaction.txn_date.asc()).all()
-
-    aggregates = {}
-    for txn in transactions:
-        key = txn.producer_id or 0
-        if key not in aggregates:
-            producer_name = txn.producer.display_name if txn.producer else "Unassigned"
-            workspace_name = "Unassigned"
-            if txn.producer and txn.producer.workspace:
-                workspace_name = txn.producer.workspace.name
-            elif txn.workspace:
-                workspace_name = txn.workspace.name
-            elif txn.batch and txn.batch.workspace:
-                workspace_name = txn.batch.workspace.name
-            aggregates[key] = {
+    producer_workspace = aliased(Workspace)
+    aggregates = (
+        query.outerjoin(Producer, Producer.id == CommissionTransaction.producer_id)
+        .outerjoin(producer_workspace, producer_workspace.id == Producer.workspace_id)
+        .with_entities(
+            CommissionTransaction.producer_id,
+            Producer.display_name,
+            producer_workspace.name,
+            func.sum(CommissionTransaction.premium),
+            func.sum(CommissionTransaction.amount),
+            func.count(CommissionTransaction.id),
+        )
+        .group_by(
+            CommissionTransaction.producer_id,
+            Producer.display_name,
+            producer_workspace.name,
+        )
+        .order_by(func.sum(CommissionTransaction.premium).desc().nullslast())
+        .all()
+    )
+
+    table_rows = []
+    for producer_key, producer_name, workspace_name, premium, commission, sales in aggregates:
+        if producer_key is None:
+            producer_name = "Unassigned"
+            workspace_name = _unassigned_workspace_name(query)
+        table_rows.append(
+            {
                 "producer": producer_name,
-                "workspace": workspace_name,
-                "premium": 0.0,
-                "commission": 0.0,
-                "sales": 0,
+                "workspace": workspace_name or "Unassigned",
+                "premium": round(float(premium or 0), 2),
+                "commission": round(float(commission or 0), 2),
+                "sales": sales,
             }
-        aggregates[key]["premium"] += float(txn.premium or 0)
-        aggregates[key]["commission"] += float(txn.amount or 0)
-        aggregates[key]["sales"] += 1
-
-    table_rows = [
-        {
-            "producer": data["producer"],
-            "workspace": data["workspace"],
-            "premium": round(data["premium"], 2),
-            "commission": round(data["commission"], 2),
-            "sales": data["sales"],
-        }
-        for data in aggregates.values()
-    ]
-
-    table_rows.sort(key=lambda row: row["premium"], reverse=True)
+        )
 
     summary = {
         "commission": sum(row["commission"] for row in table_rows),
@@ -440,7 +506,7 @@ def production_summary():
     }
 
     if fmt == "pdf":
-        pdf_bytes = _build_pdf_report(title, dataset)
+        pdf_bytes = _cached_pdf(lambda: _build_pdf_report(title, dataset))
         return send_file(
             BytesIO(pdf_bytes),
             mimetype="application/pdf",
@@ -448,22 +514,10 @@ def production_summary():
             download_name=f"{filename}.pdf",
         )
 
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow([column["label"] for column in columns])
-    for row in table_rows:
-        writer.writerow(
-            [
-                _format_csv_value(row, column)
-                for column in columns
-            ]
-        )
-    output.seek(0)
-    return send_file(
-        BytesIO(output.getvalue().encode("utf-8")),
-        mimetype="text/csv",
-        as_attachment=True,
-        download_name=f"{filename}.csv",
+    return _csv_response(
+        filename,
+        [column["label"] for column in columns],
+        ([_format_csv_value(row, column) for column in columns] for row in table_rows),
     )
 
 
@@ -474,7 +528,7 @@ def activity_detail(txn_id: int):
         id=txn_id, org_id=current_user.org_id
     ).first_or_404()
 
-    workspace_ids = get_accessible_workspace_ids(current_user)
+    workspace_ids = get_accessible_workspace_ids_cached(current_user)
     if current_user.role == "agent" and workspace_ids and txn.workspace_id not in workspace_ids:
         abort(403)
 
@@ -509,18 +563,38 @@ def assign_transaction_producer(txn_id: int):
     return redirect(next_url)
 
 
-def _build_analytics_dataset(params, include_rows=False):
-    org_id = current_user.org_id
-    workspace_ids = get_accessible_workspace_ids(current_user)
+def _txn_base_query(org_id, workspace_ids):
+    """Transactions for ``org_id``, limited to ``workspace_ids`` when given.
+
+    A transaction belongs to a workspace directly or through its import batch.
+    """
 
     query = CommissionTransaction.query.filter_by(org_id=org_id)
     if workspace_ids:
-        query = query.filter(
-            or_(
-                CommissionTransaction.workspace_id.in_(workspace_ids),
-                CommissionTransaction.batch.has(ImportBatch.workspace_id.in_(workspace_ids)),
-            )
+        query = _scope_to_workspaces(query, workspace_ids)
+    return query
+
+
+def _scope_to_workspaces(query, workspace_ids):
+    """Filter transactions by workspace through a join rather than ``EXISTS``.
+
+    ``batch_id`` is many-to-one, so the outer join never duplicates rows.
+    """
+
+    batch = aliased(ImportBatch)
+    return query.outerjoin(batch, batch.id == CommissionTransaction.batch_id).filter(
+        or_(
+            CommissionTransaction.workspace_id.in_(workspace_ids),
+            batch.workspace_id.in_(workspace_ids),
         )
+    )
+
+
+def _build_analytics_dataset(params, include_rows=False, row_limit=None):
+    org_id = current_user.org_id
+    workspace_ids = get_accessible_workspace_ids_cached(current_user)
+
+    query = _txn_base_query(org_id, workspace_ids)
 
     producer_id = params.get("producer_id")
     if producer_id:
@@ -565,93 +639,173 @@ def _build_analytics_dataset(params, include_rows=False):
     if date_to:
         query = query.filter(CommissionTransaction.txn_date <= date_to)
 
-    group_by = params.get("group_by") or "month"
+    result = _analytics_aggregate(query, params.get("group_by") or "month")
+    if include_rows:
+        result["table"] = _analytics_rows(query, row_limit)
+    return result
 
-    transactions = query.order_by(CommissionTransaction.txn_date.asc()).all()
 
-    totals = {"premium": 0.0, "commission": 0.0}
-    grouped = defaultdict(lambda: {"premium": 0.0, "commission": 0.0})
+def _analytics_aggregate(query, group_by):
+    """Return chart labels, series and summary totals for ``query``."""
 
-    table_rows = []
-    for txn in transactions:
-        premium = float(txn.premium or 0)
-        commission = float(txn.amount or 0)
-        totals["premium"] += premium
-        totals["commission"] += commission
-        key = _analytics_group_key(txn, group_by)
-        grouped[key]["premium"] += premium
-        grouped[key]["commission"] += commission
-        if include_rows:
-            table_rows.append(_commission_row(txn))
-
-    labels = sorted(grouped.keys())
-    series = [
-        {
-            "label": "Commission",
-            "data": [round(grouped[label]["commission"], 2) for label in labels],
-        },
-        {
-            "label": "Premium",
-            "data": [round(grouped[label]["premium"], 2) for label in labels],
-        },
-    ]
+    grouped_query, group_expr = _analytics_grouping(query, group_by)
+    labels = []
+    commission_data = []
+    premium_data = []
+    for label, premium, commission in _sum_by(grouped_query, group_expr):
+        labels.append(label)
+        commission_data.append(round(commission, 2))
+        premium_data.append(round(premium, 2))
 
-    result = {
+    return {
         "labels": labels,
-        "series": series,
-        "summary": {
-            "commission": round(totals["commission"], 2),
-            "premium": round(totals["premium"], 2),
-            "count": len(transactions),
-        },
+        "series": [
+            {"label": "Commission", "data": commission_data},
+            {"label": "Premium", "data": premium_data},
+        ],
+        "summary": _summary_totals(query),
     }
 
-    if include_rows:
-        table_rows.sort(key=lambda row: row["date"], reverse=True)
-        result["table"] = table_rows
 
-    return result
+def _analytics_rows(query, row_limit=None):
+    """Return formatted detail rows for ``query``, newest first."""
+
+    transactions = _commission_row_query(query).order_by(
+        CommissionTransaction.txn_date.desc(), CommissionTransaction.id.desc()
+    )
+    if row_limit is not None:
+        transactions = transactions.limit(row_limit)
+    link_prefix = _activity_link_prefix()
+    return [
+        _commission_row_from_row(row, link_prefix)
+        for row in transactions.yield_per(_STREAM_BATCH_SIZE)
+    ]
 
 
-def _analytics_group_key(txn, group_by):
+def _analytics_grouping(query, group_by):
+    """Return ``(query, expression)`` used to bucket analytics totals in SQL."""
+
     if group_by == "category":
-        return txn.category or "Uncategorized"
+        return query, func.coalesce(
+            func.nullif(CommissionTransaction.category, ""), "Uncategorized"
+        )
     if group_by == "producer":
-        return txn.producer.display_name if txn.producer else "Unassigned"
+        return (
+            query.outerjoin(Producer, Producer.id == CommissionTransaction.producer_id),
+            func.coalesce(Producer.display_name, "Unassigned"),
+        )
     if group_by == "workspace":
-        if txn.workspace:
-            return txn.workspace.name
-        if txn.batch and txn.batch.workspace:
-            return txn.batch.workspace.name
-        return "Unassigned"
+        grouped_query, workspace_name = _with_workspace_name(query)
+        return grouped_query, func.coalesce(workspace_name, "Unassigned")
     if group_by == "product":
-        return txn.product_type or "Other"
+        return query, func.coalesce(
+            func.nullif(CommissionTransaction.product_type, ""), "Other"
+        )
     if group_by == "status":
-        return txn.status or "Unknown"
-    date_value = txn.txn_date or datetime.utcnow().date()
-    if group_by == "day":
-        return date_value.strftime("%Y-%m-%d")
-    return date_value.strftime("%Y-%m")
+        return query, func.coalesce(
+            func.nullif(CommissionTransaction.status, ""), "Unknown"
+        )
+    return query, _date_bucket(
+        CommissionTransaction.txn_date, "day" if group_by == "day" else "month"
+    )
+
+
+def _date_bucket(column, period):
+    """Format ``column`` as ``YYYY-MM-DD`` or ``YYYY-MM`` in the database."""
+
+    if db.engine.dialect.name == "postgresql":
+        pattern = "YYYY-MM-DD" if period == "day" else "YYYY-MM"
+        return func.to_char(column, pattern)
+    pattern = "%Y-%m-%d" if period == "day" else "%Y-%m"
+    return func.strftime(pattern, column)
+
+
+def _unassigned_workspace_name(query):
+    """Workspace shown for sales without a producer, taken from the earliest one."""
+
+    named_query, workspace_name = _with_workspace_name(
+        query.filter(CommissionTransaction.producer_id.is_(None))
+    )
+    row = (
+        named_query.with_entities(CommissionTransaction.id, workspace_name)
+        .order_by(CommissionTransaction.txn_date.asc())
+        .first()
+    )
+    return row[1] if row else None
+
+
+def _with_workspace_name(query):
+    """Return ``query`` joined to both workspace sources and the name expression.
+
+    Transactions carry their own workspace; older imports only record it on
+    the batch, so the batch workspace is used as the fallback.
+    """
+
+    txn_workspace = aliased(Workspace)
+    batch = aliased(ImportBatch)
+    batch_workspace = aliased(Workspace)
+    joined = (
+        query.outerjoin(
+            txn_workspace, txn_workspace.id == CommissionTransaction.workspace_id
+        )
+        .outerjoin(batch, batch.id == CommissionTransaction.batch_id)
+        .outerjoin(batch_workspace, batch_workspace.id == batch.workspace_id)
+    )
+    return joined, func.coalesce(txn_workspace.name, batch_workspace.name)
+
+
+def _sum_by(query, key):
+    """Return ``(key, premium, commission)`` totals grouped and ordered by ``key``."""
+
+    rows = (
+        query.with_entities(
+            key,
+            func.sum(CommissionTransaction.premium),
+            func.sum(CommissionTransaction.amount),
+        )
+        .group_by(key)
+        .order_by(key)
+        .all()
+    )
+    return [
+        (label, float(premium or 0), float(commission or 0))
+        for label, premium, commission in rows
+    ]
+
+
+def _summary_totals(query):
+    """Return the rounded commission/premium totals and row count for ``query``."""
+
+    count, premium, commission = query.with_entities(
+        func.count(CommissionTransaction.id),
+        func.sum(CommissionTransaction.premium),
+        func.sum(CommissionTransaction.amount),
+    ).one()
+    return {
+        "commission": round(float(commission or 0), 2),
+        "premium": round(float(premium or 0), 2),
+        "count": count,
+    }
 
 
+@lru_cache(maxsize=256)
 def _parse_date(raw):
     if not raw:
         return None
-    for fmt in ("%Y-%m-%d", "%Y-%m"):
-        try:
-            value = datetime.strptime(raw, fmt).date()
-            if fmt == "%Y-%m":
-                return value.replace(day=1)
-            return value
-        except ValueError:
-            continue
-    return None
+    raw = raw.strip()
+    try:
+        if len(raw) == 7 and raw[4] == "-":
+            return date(int(raw[:4]), int(raw[5:]), 1)
+        return date.fromisoformat(raw)
+    except ValueError:
+        return None
 
 
 def _build_pdf_report(title, dataset):
     summary = dataset.get("summary", {})
     table = dataset.get("table", [])
     columns = dataset.get("columns", [])
+    total_rows = dataset.get("total_rows", len(table))
 
     buffer = BytesIO()
     document = SimpleDocTemplate(
@@ -664,25 +818,9 @@ def _build_pdf_report(title, dataset):
         bottomMargin=0.75 * inch,
     )
 
-    styles = getSampleStyleSheet()
-    brand_blue = colors.HexColor("#2A4BFF")
-    header_style = ParagraphStyle(
-        "ReportHeader",
-        parent=styles["Heading1"],
-        fontSize=22,
-        leading=28,
-        textColor=brand_blue,
-    )
-    subtitle_style = ParagraphStyle(
-        "ReportSubtitle",
-        parent=styles["Heading2"],
-        fontSize=14,
-        leading=18,
-    )
-
     story = [
-        Paragraph("TrackYourSheets", header_style),
-        Paragraph(title, subtitle_style),
+        Paragraph("TrackYourSheets", _HEADER_STYLE),
+        Paragraph(title.translate(_PARAGRAPH_ESCAPE), _SUBTITLE_STYLE),
         Spacer(1, 0.2 * inch),
     ]
 
@@ -698,70 +836,55 @@ def _build_pdf_report(title, dataset):
         hAlign="LEFT",
         colWidths=[2.3 * inch, 4.0 * inch],
     )
-    summary_table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), brand_blue),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("ALIGN", (0, 0), (-1, 0), "LEFT"),
-                ("ALIGN", (1, 1), (1, -1), "RIGHT"),
-                ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.whitesmoke, colors.white]),
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
-                ("FONTSIZE", (0, 0), (-1, 0), 11),
-            ]
-        )
-    )
+    summary_table.setStyle(_SUMMARY_TABLE_STYLE)
     story.append(summary_table)
     story.append(Spacer(1, 0.3 * inch))
 
     if columns and table:
-        header_row = [column["label"] for column in columns]
-        max_rows = 200
+        # Column widths are fixed, so clip cells up front; ReportLab would
+        # otherwise draw long names across the neighbouring columns.
+        widths = _pdf_column_widths(tuple(column["key"] for column in columns))
+        header_row = [
+            _fit_pdf_cell(column["label"], width, *_PDF_HEADER_FONT)
+            for column, width in zip(columns, widths)
+        ]
+        max_rows = _PDF_MAX_ROWS
         data_rows = []
         for row in table[:max_rows]:
             rendered_cells = []
-            for column in columns:
+            for column, width in zip(columns, widths):
                 value = row.get(column["key"])
                 if column.get("format") == "currency" and value is not None:
                     try:
-                        rendered_cells.append(f"${float(value):,.2f}")
+                        cell = f"${float(value):,.2f}"
                     except (TypeError, ValueError):
-                        rendered_cells.append("$0.00")
+                        cell = "$0.00"
                 else:
-                    rendered_cells.append(str(value) if value not in {None, ""} else "—")
+                    cell = str(value) if value not in {None, ""} else "—"
+                rendered_cells.append(_fit_pdf_cell(cell, width, *_PDF_BODY_FONT))
             data_rows.append(rendered_cells)
         tabular_data = [header_row, *data_rows]
-        pdf_table = Table(tabular_data, repeatRows=1)
-        pdf_table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), brand_blue),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 10),
-                    ("FONTSIZE", (0, 1), (-1, -1), 9),
-                    ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.whitesmoke, colors.white]),
-                    ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
-                    ("ALIGN", (0, 0), (-1, 0), "LEFT"),
-                    ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ]
-            )
+        pdf_table = Table(
+            tabular_data,
+            colWidths=list(widths),
+            rowHeights=[_PDF_HEADER_ROW_HEIGHT] + [_PDF_ROW_HEIGHT] * len(data_rows),
+            repeatRows=1,
         )
+        pdf_table.setStyle(_REPORT_TABLE_STYLE)
         story.append(pdf_table)
-        if len(table) > max_rows:
+        if total_rows > len(data_rows):
             story.append(Spacer(1, 0.1 * inch))
             story.append(
                 Paragraph(
-                    f"Showing first {max_rows} rows of {len(table)}. Export CSV for the full data set.",
-                    styles["Italic"],
+                    f"Showing first {len(data_rows)} rows of {total_rows}. Export CSV for the full data set.",
+                    _STYLES["Italic"],
                 )
             )
     else:
-        body_style = styles["BodyText"]
+        body_style = _STYLES["BodyText"]
         if table:
             for row in table:
-                story.append(Paragraph(str(row), body_style))
+                story.append(Paragraph(str(row).translate(_PARAGRAPH_ESCAPE), body_style))
                 story.append(Spacer(1, 0.1 * inch))
         else:
             story.append(Paragraph("No transactions available for this report.", body_style))
@@ -770,34 +893,245 @@ def _build_pdf_report(title, dataset):
     return buffer.getvalue()
 
 
-def _commission_row(txn):
-    workspace_name = "—"
-    if txn.workspace:
-        workspace_name = txn.workspace.name
-    elif txn.batch and txn.batch.workspace:
-        workspace_name = txn.batch.workspace.name
-
-    split_value = txn.manual_split_pct or txn.split_pct
-
-    policy_number = "—"
-    if txn.policy and txn.policy.policy_number:
-        policy_number = txn.policy.policy_number
-
-    row = {
-        "id": txn.id,
-        "date": txn.txn_date.strftime("%Y-%m-%d") if txn.txn_date else "",
-        "producer": txn.producer.display_name if txn.producer else "Unassigned",
-        "workspace": workspace_name,
-        "policy": policy_number,
-        "category": txn.category or "Uncategorized",
-        "product_type": txn.product_type or "—",
-        "premium": float(txn.premium or 0),
-        "commission": float(txn.amount or 0),
-        "split": f"{float(split_value):.2f}%" if split_value is not None else "—",
-        "status": txn.status or "—",
-        "link": url_for("reports.activity_detail", txn_id=txn.id),
+@lru_cache(maxsize=16)
+def _pdf_column_widths(keys):
+    """Split the printable width across ``keys`` using fixed per-column weights."""
+
+    weights = [_PDF_COLUMN_WEIGHTS.get(key, 1.3) for key in keys]
+    scale = _PDF_CONTENT_WIDTH / sum(weights)
+    return tuple(weight * scale for weight in weights)
+
+
+def _fit_pdf_cell(text, width, font_name, font_size):
+    """Shorten ``text`` with an ellipsis so it fits a ``width``-point cell."""
+
+    available = width - 2 * _PDF_CELL_PADDING
+    text_width = stringWidth(text, font_name, font_size)
+    if text_width <= available:
+        return text
+    limit = available - stringWidth("…", font_name, font_size)
+    # Start from a proportional cut so long values don't shrink a char at a time.
+    text = text[: int(len(text) * limit / text_width) + 1]
+    while text and stringWidth(text, font_name, font_size) > limit:
+        text = text[:-1]
+    return text.rstrip() + "…"
+
+
+def _pdf_data_version(org_id):
+    """Return ``org_id``'s report data version for the PDF cache key.
+
+    Read from the database rather than tracked in-process, so a write made
+    by any worker retires cached PDFs in every worker. It is a primary-key
+    lookup, keeping cache hits cheap for large organisations.
+    """
+
+    return (
+        db.session.query(Organization.report_data_version)
+        .filter(Organization.id == org_id)
+        .scalar()
+    )
+
+
+def _cached_pdf(build):
+    """Return PDF bytes for the current export request, rendering on a miss.
+
+    Entries are scoped to the organisation, user, endpoint and query string
+    so agents never receive documents built from another user's workspaces.
+    The key also carries :func:`_pdf_data_version`, so imports, edits and
+    renames of producers, workspaces, carriers or policies take effect on
+    the next request in every worker.
+    """
+
+    key = (
+        current_user.org_id,
+        current_user.id,
+        request.endpoint,
+        hashlib.sha1(request.query_string).hexdigest(),
+        _pdf_data_version(current_user.org_id),
+    )
+    now = time.monotonic()
+    with _pdf_cache_lock:
+        entry = _pdf_cache.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+
+    pdf_bytes = build()
+
+    with _pdf_cache_lock:
+        for cached_key in [k for k, (expires, _) in _pdf_cache.items() if expires <= now]:
+            del _pdf_cache[cached_key]
+        if len(_pdf_cache) >= _PDF_CACHE_MAX_ENTRIES:
+            del _pdf_cache[min(_pdf_cache, key=lambda k: _pdf_cache[k][0])]
+        _pdf_cache[key] = (now + _PDF_CACHE_TTL, pdf_bytes)
+    return pdf_bytes
+
+
+def _commission_row_query(query):
+    """Narrow ``query`` to the scalar columns read by :func:`_commission_row_from_row`.
+
+    Export rows are read-only, so selecting labelled columns through outer
+    joins avoids hydrating ORM instances and their relationship graph.
+    """
+
+    joined, workspace_name = _with_workspace_name(query)
+    return (
+        joined.outerjoin(Producer, Producer.id == CommissionTransaction.producer_id)
+        .outerjoin(Policy, Policy.id == CommissionTransaction.policy_id)
+        .with_entities(
+            CommissionTransaction.id,
+            CommissionTransaction.txn_date,
+            CommissionTransaction.premium,
+            CommissionTransaction.amount,
+            CommissionTransaction.category,
+            CommissionTransaction.product_type,
+            CommissionTransaction.status,
+            func.coalesce(
+                func.nullif(CommissionTransaction.manual_split_pct, 0),
+                CommissionTransaction.split_pct,
+            ).label("split_pct"),
+            func.coalesce(Producer.display_name, "Unassigned").label("producer"),
+            func.coalesce(workspace_name, "—").label("workspace"),
+            func.coalesce(func.nullif(Policy.policy_number, ""), "—").label("policy"),
+        )
+    )
+
+
+def _activity_link_prefix():
+    """Return the activity detail URL without its trailing transaction id."""
+
+    return url_for("reports.activity_detail", txn_id=0)[:-1]
+
+
+def _commission_row_from_row(row, link_prefix):
+    return {
+        "id": row.id,
+        "date": row.txn_date.strftime("%Y-%m-%d") if row.txn_date else "",
+        "producer": row.producer,
+        "workspace": row.workspace,
+        "policy": row.policy,
+        "category": row.category or "Uncategorized",
+        "product_type": row.product_type or "—",
+        "premium": float(row.premium or 0),
+        "commission": float(row.amount or 0),
+        "split": f"{float(row.split_pct):.2f}%" if row.split_pct is not None else "—",
+        "status": row.status or "—",
+        "link": f"{link_prefix}{row.id}",
     }
-    return row
+
+
+def _commission_csv_values(row):
+    """CSV cells for a commission sheet row, in the sheet's column order."""
+
+    return [
+        row.txn_date.isoformat() if row.txn_date else "",
+        row.producer,
+        row.workspace,
+        row.policy,
+        row.category or "Uncategorized",
+        format(row.premium or 0, ".2f"),
+        format(row.amount or 0, ".2f"),
+        f"{float(row.split_pct):.2f}%" if row.split_pct is not None else "—",
+        row.status or "—",
+    ]
+
+
+def _csv_response(filename, header, rows):
+    """Stream ``rows`` as a CSV attachment, flushing in small encoded chunks."""
+
+    def generate():
+        buffer = BytesIO()
+        writer = csv.writer(
+            TextIOWrapper(buffer, encoding="utf-8", newline="", write_through=True)
+        )
+        writer.writerow(header)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        for row in rows:
+            writer.writerow(row)
+            if buffer.tell() >= _CSV_CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/csv",
+        headers={
+            "Content-Disposition": f'attachment; filename="{secure_filename(filename)}.csv"'
+        },
+    )
+
+
+def _commission_copy_query(query):
+    """Commission sheet CSV columns formatted as text by Postgres.
+
+    Mirrors :func:`_commission_row_from_row` and :func:`_format_csv_value` so
+    ``COPY`` output matches the Python export column for column.
+    """
+
+    joined, workspace_name = _with_workspace_name(query)
+    split_pct = func.coalesce(
+        func.nullif(CommissionTransaction.manual_split_pct, 0),
+        CommissionTransaction.split_pct,
+    )
+    return (
+        joined.outerjoin(Producer, Producer.id == CommissionTransaction.producer_id)
+        .outerjoin(Policy, Policy.id == CommissionTransaction.policy_id)
+        .with_entities(
+            cast(CommissionTransaction.txn_date, String).label("Date"),
+            func.coalesce(Producer.display_name, "Unassigned").label("Producer"),
+            func.coalesce(workspace_name, "—").label("Workspace"),
+            func.coalesce(func.nullif(Policy.policy_number, ""), "—").label("Policy"),
+            func.coalesce(
+                func.nullif(CommissionTransaction.category, ""), "Uncategorized"
+            ).label("Category"),
+            cast(func.coalesce(CommissionTransaction.premium, 0), Numeric(14, 2)).label(
+                "Premium"
+            ),
+            cast(func.coalesce(CommissionTransaction.amount, 0), Numeric(14, 2)).label(
+                "Commission"
+            ),
+            case(
+                (split_pct.is_(None), "—"),
+                else_=func.concat(func.to_char(split_pct, "FM9999990.00"), "%"),
+            ).label("Split"),
+            func.coalesce(func.nullif(CommissionTransaction.status, ""), "—").label(
+                "Status"
+            ),
+        )
+    )
+
+
+def _copy_csv_response(filename, query):
+    """Export ``query`` with Postgres ``COPY ... TO STDOUT`` as a CSV download.
+
+    The database formats every row, so Python never touches individual
+    records. Output is spooled (spilling to disk past a few MB) rather than
+    held in memory.
+    """
+
+    compiled = query.statement.compile(
+        dialect=db.engine.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    cursor = db.session.connection().connection.cursor()
+    try:
+        select_sql = cursor.mogrify(str(compiled), compiled.params)
+        output = SpooledTemporaryFile(max_size=_COPY_SPOOL_SIZE)
+        cursor.copy_expert(
+            b"COPY (" + select_sql + b") TO STDOUT WITH (FORMAT csv, HEADER true)",
+            output,
+        )
+    finally:
+        cursor.close()
+    output.seek(0)
+    return send_file(
+        output,
+        mimetype="text/csv",
+        as_attachment=True,
+        download_name=f"{secure_filename(filename)}.csv",
+    )
 
 
 def _format_csv_value(row, column):
@@ -813,11 +1147,56 @@ def _format_csv_value(row, column):
 
 
 def _fetch_status_categories(org_id: int):
-    tags = (
-        CategoryTag.query.filter_by(org_id=org_id, kind="status")
+    now = time.monotonic()
+    with _status_tag_cache_lock:
+        entry = _status_tag_cache.get(org_id)
+    if entry and entry[0] > now:
+        return list(entry[1])
+
+    names = tuple(
+        name
+        for (name,) in CategoryTag.query.filter_by(org_id=org_id, kind="status")
+        .with_entities(CategoryTag.name)
         .order_by(CategoryTag.name.asc())
-        .all()
+    ) or ("Raw", "Existing", "Renewal")
+    with _status_tag_cache_lock:
+        _status_tag_cache[org_id] = (now + _STATUS_TAG_CACHE_TTL, names)
+    return list(names)
+
+
+def _mark_report_data_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and target.org_id is not None:
+        session.info.setdefault("report_data_orgs", set()).add(target.org_id)
+
+
+for _model in (CommissionTransaction, Producer, Workspace, Carrier, Policy):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _mark_report_data_changed)
+
+
+@event.listens_for(db.session, "after_flush")
+def _bump_report_data_version(session, flush_context):
+    """Bump each touched organisation's version once per flush, not per row."""
+
+    org_ids = session.info.pop("report_data_orgs", None)
+    if not org_ids:
+        return
+    organizations = Organization.__table__
+    session.connection().execute(
+        update(organizations)
+        .where(organizations.c.id.in_(sorted(org_ids)))
+        .values(
+            report_data_version=organizations.c.report_data_version + 1,
+            # Keep the organisation's own updated_at for real edits.
+            updated_at=organizations.c.updated_at,
+        )
     )
-    if tags:
-        return [tag.name for tag in tags]
-    return ["Raw", "Existing", "Renewal"]
+
+
+@event.listens_for(CategoryTag, "after_insert")
+@event.listens_for(CategoryTag, "after_update")
+@event.listens_for(CategoryTag, "after_delete")
+def _invalidate_status_tag_cache(mapper, connection, target):
+    with _status_tag_cache_lock:
+        _status_tag_cache.pop(target.org_id, None)
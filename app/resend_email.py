@@ -1,101 +1,424 @@
 """Resend email helpers for TrackYourSheets."""
 from __future__ import annotations
 
-from dotenv import load_dotenv
-
-load_dotenv()
-
+import atexit
+import hashlib
+import io
+import json
+import logging
 import os
-import html
+import re
 import threading
 import time
-from typing import Iterable, Mapping, MutableMapping, Optional, Sequence, Union
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import chain
+from types import MappingProxyType
+from typing import Iterable, Iterator, Mapping, Optional, Sequence, Union
 
 import requests
-
-import resend
 from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
 
 EmailRecipient = Union[str, Mapping[str, str]]
 
-_SEND_THROTTLE_SECONDS = 10.0
-_send_lock = threading.Lock()
-_last_send_ts: float = 0.0
+_RESEND_API_URL = "https://api.resend.com"
+_RESEND_EMAILS_URL = f"{_RESEND_API_URL}/emails"
+_RESEND_BATCH_URL = f"{_RESEND_API_URL}/emails/batch"
+_RESEND_VERIFY_URL = f"{_RESEND_API_URL}/emails/verify"
 
 
-def _throttle_email_sends() -> None:
-    """Ensure we respect downstream rate limits when sending emails."""
+def _build_http_session() -> requests.Session:
+    """Return a keep-alive session shared by every Resend API call."""
 
-    global _last_send_ts
-    with _send_lock:
-        now = time.monotonic()
-        wait_for = _SEND_THROTTLE_SECONDS - (now - _last_send_ts)
-        if wait_for > 0:
+    session = requests.Session()
+    # urllib3 does not retry POST reads by default, so a retry never
+    # duplicates a message that Resend already accepted.
+    adapter = HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=32,
+        max_retries=Retry(total=2, backoff_factor=0.2),
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+_http_session = _build_http_session()
+
+class _TokenBucket:
+    """Thread-safe token bucket pacing outbound API calls.
+
+    ``acquire`` blocks only as long as needed for the next token, so a
+    burst within ``capacity`` goes out immediately.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.last_refill) * self.rate
+                )
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_for = (1 - self.tokens) / self.rate
             time.sleep(wait_for)
-        _last_send_ts = time.monotonic()
 
 
-def _split_emails(value: Optional[str]) -> list[str]:
-    if not value:
-        return []
-    return [part.strip() for part in value.split(",") if part and part.strip()]
-
-
-def _deduplicate(recipients: Sequence[Mapping[str, str]]) -> list[Mapping[str, str]]:
-    seen: set[str] = set()
-    deduped: list[Mapping[str, str]] = []
-    for entry in recipients:
-        email = (entry.get("email") or "").lower()
-        if not email or email in seen:
-            continue
-        seen.add(email)
-        deduped.append(entry)
-    return deduped
-
-
-def _normalize_recipients(recipients: Sequence[EmailRecipient]) -> list[MutableMapping[str, str]]:
-    normalised: list[MutableMapping[str, str]] = []
-    for recipient in recipients:
-        if isinstance(recipient, str):
-            email = recipient.strip()
-            if email:
-                normalised.append({"email": email})
-        elif isinstance(recipient, Mapping):
-            email = (recipient.get("email") or "").strip()
-            if not email:
-                continue
-            entry: MutableMapping[str, str] = {"email": email}
-            name = (recipient.get("name") or "").strip()
-            if name:
-                entry["name"] = name
-            normalised.append(entry)
-    return _deduplicate(normalised)
-
-
-def _resend_config() -> dict:
+_send_buckets: dict[float, _TokenBucket] = {}
+_send_buckets_lock = threading.Lock()
+
+
+def _throttle_email_sends(rate: float) -> None:
+    """Wait for a send slot under the configured per-process API rate."""
+
+    with _send_buckets_lock:
+        bucket = _send_buckets.get(rate)
+        if bucket is None:
+            bucket = _send_buckets[rate] = _TokenBucket(rate, capacity=max(1.0, rate))
+    bucket.acquire()
+
+
+# Resend accepts at most this many messages per batch request.
+_BATCH_SEND_LIMIT = 100
+
+
+@dataclass
+class _BatchContext:
+    pending: list[dict[str, object]] = field(default_factory=list)
+
+
+_batch_state = threading.local()
+
+
+@contextmanager
+def resend_batch() -> Iterator[None]:
+    """Collect emails sent inside the block and submit them as one batch request.
+
+    Nested blocks join the outermost batch, which flushes on exit.
+    """
+
+    if getattr(_batch_state, "context", None) is not None:
+        yield
+        return
+    ctx = _BatchContext()
+    _batch_state.context = ctx
+    try:
+        yield
+    finally:
+        _batch_state.context = None
+        _flush_batch(ctx.pending)
+
+
+def _flush_batch(pending: Sequence[dict[str, object]]) -> None:
+    if pending:
+        _dispatch(pending)
+
+
+_EMAIL_WORKERS = 8
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_pending_sends: set[Future] = set()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the shared send pool, creating it on first use."""
+
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_EMAIL_WORKERS, thread_name_prefix="resend-send"
+            )
+            # Let queued messages go out when the worker shuts down cleanly.
+            atexit.register(_executor.shutdown, wait=True)
+        return _executor
+
+
+def _deliver(app, config: "_ResendConfig", messages: Sequence[dict[str, object]]) -> bool:
+    """Send ``messages`` to Resend, using the batch endpoint for groups."""
+
+    delivered = True
+    with app.app_context():
+        for start in range(0, len(messages), _BATCH_SEND_LIMIT):
+            chunk = list(messages[start : start + _BATCH_SEND_LIMIT])
+            _throttle_email_sends(config.send_rate)
+            try:
+                response = _http_session.post(
+                    _RESEND_EMAILS_URL if len(chunk) == 1 else _RESEND_BATCH_URL,
+                    headers=_auth_headers(config.api_key),
+                    data=_json_bytes(chunk[0] if len(chunk) == 1 else chunk),
+                    timeout=config.timeout,
+                )
+                response.raise_for_status()
+            except Exception as exc:  # pragma: no cover - network failures logged only
+                app.logger.warning(
+                    "Resend send error",
+                    exc_info=exc,
+                    extra={"batch_size": len(chunk)},
+                )
+                delivered = False
+    return delivered
+
+
+def _dispatch(messages: Sequence[dict[str, object]]) -> bool:
+    """Hand ``messages`` to the background pool, or send inline when disabled."""
+
     app = current_app._get_current_object()
-    return {
-        "api_key": app.config.get("RESEND_API_KEY") or os.environ.get("RESEND_API_KEY"),
-        "from_email": app.config.get("RESEND_FROM_EMAIL")
-        or os.environ.get("RESEND_FROM_EMAIL"),
-        "from_name": app.config.get("RESEND_FROM_NAME")
-        or os.environ.get("RESEND_FROM_NAME", "TrackYourSheets"),
-        "reply_to": _split_emails(
-            app.config.get("RESEND_REPLY_TO") or os.environ.get("RESEND_REPLY_TO")
+    config = _resend_config()
+    if not config.api_key:
+        return False
+    if not config.async_send:
+        return _deliver(app, config, messages)
+    future = _get_executor().submit(_deliver, app, config, list(messages))
+    with _executor_lock:
+        _pending_sends.add(future)
+    future.add_done_callback(_forget_send)
+    return True
+
+
+def _forget_send(future: Future) -> None:
+    with _executor_lock:
+        _pending_sends.discard(future)
+
+
+def flush_pending_emails(timeout: Optional[float] = None) -> bool:
+    """Wait for queued background sends; return ``False`` if any are still running."""
+
+    with _executor_lock:
+        pending = set(_pending_sends)
+    if not pending:
+        return True
+    _, not_done = wait(pending, timeout=timeout)
+    return not not_done
+
+
+# Login alerts repeated inside this window are dropped, so double submits and
+# client retries do not send twice. 2FA codes are throttled where they are
+# issued instead (``User.generate_two_factor_code``).
+_RECENT_SEND_TTL = 30.0
+_RECENT_SEND_MAX_ENTRIES = 4096
+_recent_sends: dict[bytes, float] = {}
+_recent_sends_lock = threading.Lock()
+
+
+def _recent_send_key(*parts: object) -> bytes:
+    # Hashed so addresses are not kept in memory verbatim.
+    return hashlib.blake2b(
+        "\0".join(str(part) for part in parts).encode("utf-8"), digest_size=16
+    ).digest()
+
+
+def _claim_recent_send(key: bytes) -> bool:
+    """Record ``key`` and return ``False`` if it was already sent recently."""
+
+    now = time.monotonic()
+    with _recent_sends_lock:
+        expires = _recent_sends.get(key)
+        if expires is not None and expires > now:
+            return False
+        if len(_recent_sends) >= _RECENT_SEND_MAX_ENTRIES:
+            for stale in [k for k, exp in _recent_sends.items() if exp <= now]:
+                del _recent_sends[stale]
+            if len(_recent_sends) >= _RECENT_SEND_MAX_ENTRIES:
+                del _recent_sends[min(_recent_sends, key=_recent_sends.__getitem__)]
+        _recent_sends[key] = now + _RECENT_SEND_TTL
+    return True
+
+
+def _release_recent_send(key: bytes) -> None:
+    with _recent_sends_lock:
+        _recent_sends.pop(key, None)
+
+
+# Commas with any surrounding whitespace; display names like "Ops Team <x@y>"
+# keep their inner spaces.
+_EMAIL_SEPARATOR = re.compile(r"\s*,\s*")
+
+
+def _split_emails(value: Optional[str]) -> tuple[str, ...]:
+    if not value:
+        return ()
+    return tuple(part for part in _EMAIL_SEPARATOR.split(value.strip()) if part)
+
+
+def _canonical_email(raw: Optional[str]) -> str:
+    return (raw or "").strip().lower()
+
+
+_GMAIL_DOMAINS = frozenset({"gmail.com", "googlemail.com"})
+
+
+def canonical_email_key(raw: Optional[str]) -> str:
+    """Return the key used to spot duplicate addresses.
+
+    Gmail ignores dots and ``+tag`` suffixes in the local part, so those
+    variants collapse onto one key. Other providers only get trimmed and
+    lowercased.
+    """
+
+    email = _canonical_email(raw)
+    local, sep, domain = email.rpartition("@")
+    if sep and domain in _GMAIL_DOMAINS:
+        local = local.split("+", 1)[0].replace(".", "")
+        return f"{local}@gmail.com"
+    return email
+
+
+def _normalize_addresses(addresses: Iterable[str]) -> list[str]:
+    normalised: dict[str, str] = {}
+    for email in map(_canonical_email, addresses):
+        key = canonical_email_key(email)
+        if key and key not in normalised:
+            normalised[key] = email
+    return list(normalised.values())
+
+
+def _normalize_recipients(recipients: Iterable[EmailRecipient]) -> list[str]:
+    """Return the unique, canonicalised addresses ready for the API payload."""
+
+    # Most callers pass lists of plain address strings; only mixed input (or a
+    # one-shot iterator) needs the per-entry type dispatch below.
+    if isinstance(recipients, (list, tuple)) and all(
+        isinstance(recipient, str) for recipient in recipients
+    ):
+        return _normalize_addresses(recipients)  # type: ignore[arg-type]
+    return _normalize_addresses(
+        recipient if isinstance(recipient, str) else recipient.get("email")
+        for recipient in recipients
+        if isinstance(recipient, (str, Mapping))
+    )
+
+
+@dataclass(frozen=True)
+class _ResendConfig:
+    """Resend settings resolved from app config with environment fallbacks."""
+
+    api_key: Optional[str]
+    from_email: Optional[str]
+    from_name: str
+    reply_to: tuple[str, ...]
+    default_notifications: tuple[str, ...]
+    signup_alerts: tuple[str, ...]
+    async_send: bool
+    timeout: tuple[float, float]
+    send_rate: float
+
+
+def _as_flag(value: object, *, default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _setting(app, *keys: str, default=None):
+    """Return the first configured value for ``keys``, checking app config
+    before the environment for each key."""
+
+    for key in keys:
+        value = app.config.get(key) or os.environ.get(key)
+        if value:
+            return value
+    return default
+
+
+def _load_resend_config(app) -> _ResendConfig:
+    return _ResendConfig(
+        api_key=_setting(app, "RESEND_API_KEY"),
+        from_email=_setting(app, "RESEND_FROM_EMAIL"),
+        from_name=_setting(app, "RESEND_FROM_NAME", default="TrackYourSheets"),
+        reply_to=tuple(
+            _normalize_recipients(_split_emails(_setting(app, "RESEND_REPLY_TO")))
         ),
-        "default_notifications": _split_emails(
-            app.config.get("RESEND_NOTIFICATION_EMAILS")
-            or os.environ.get("RESEND_NOTIFICATION_EMAILS")
+        default_notifications=_split_emails(_setting(app, "RESEND_NOTIFICATION_EMAILS")),
+        signup_alerts=_split_emails(
+            _setting(app, "RESEND_SIGNUP_ALERT_EMAILS", "RESEND_ALERT_RECIPIENTS")
         ),
-        "signup_alerts": _split_emails(
-            app.config.get("RESEND_SIGNUP_ALERT_EMAILS")
-            or os.environ.get("RESEND_SIGNUP_ALERT_EMAILS")
-            or app.config.get("RESEND_ALERT_RECIPIENTS")
-            or os.environ.get("RESEND_ALERT_RECIPIENTS")
+        async_send=_as_flag(
+            app.config.get("RESEND_ASYNC_SEND", os.environ.get("RESEND_ASYNC_SEND")),
+            default=True,
         ),
-    }
+        timeout=(
+            float(_setting(app, "RESEND_CONNECT_TIMEOUT", default=3.05)),
+            float(_setting(app, "RESEND_READ_TIMEOUT", default=5)),
+        ),
+        send_rate=max(float(_setting(app, "RESEND_SEND_RATE", default=2.0)), 0.1),
+    )
+
 
+def _resend_config() -> _ResendConfig:
+    """Return the app's Resend settings, parsed once and kept on ``app.extensions``."""
+
+    app = current_app._get_current_object()
+    config = app.extensions.get("resend_config")
+    if config is None:
+        config = app.extensions["resend_config"] = _load_resend_config(app)
+    return config
 
+
+def _is_configured(sender_email: Optional[str] = None) -> bool:
+    """Return whether sends can go out, logging the skip when they cannot.
+
+    Checked before any payload is rendered so an unconfigured install
+    (local development) does no templating or recipient work per email.
+    """
+
+    config = _resend_config()
+    from_email = sender_email or config.from_email
+    if config.api_key and from_email:
+        return True
+    logger = current_app.logger
+    # Unconfigured installs hit this on every email; skip building the
+    # record when INFO is filtered out.
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Skipping Resend send; configuration incomplete.",
+            extra={
+                "has_api_key": bool(config.api_key),
+                "has_from": bool(from_email),
+            },
+        )
+    return False
+
+
+def _json_bytes(payload: object) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+@lru_cache(maxsize=8)
+def _auth_headers(api_key: str) -> Mapping[str, str]:
+    """Return the shared, read-only request headers for an API key."""
+
+    return MappingProxyType(
+        {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        }
+    )
+
+
+@lru_cache(maxsize=64)
 def _build_sender(email: str, name: Optional[str]) -> str:
     if name:
         name = name.strip()
@@ -104,91 +427,207 @@ def _build_sender(email: str, name: Optional[str]) -> str:
     return email
 
 
+_HTML_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+
 def _as_html(body: str) -> str:
-    lines = body.splitlines() or [body]
-    safe_lines = [line.replace("<", "&lt;").replace(">", "&gt;") for line in lines]
-    return "<p>" + "<br>".join(safe_lines) + "</p>"
+    escaped = "\n".join(body.splitlines()).translate(_HTML_ESCAPE)
+    return "<p>" + escaped.replace("\n", "<br>") + "</p>"
+
+
+# Same replacements as html.escape(quote=True), applied in one pass.
+_ATTRIBUTE_ESCAPE = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"}
+)
 
 
 def _escape(value: object) -> str:
-    return html.escape(str(value) if value is not None else "", quote=True)
+    return ("" if value is None else str(value)).translate(_ATTRIBUTE_ESCAPE)
+
+
+# Markup shared by every email is assembled once at import; helpers only
+# splice escaped values between the fixed pieces.
+_PARAGRAPH_OPEN = '<p style="margin:0 0 16px;line-height:1.6;color:#1e293b;font-size:16px;">'
+_HIGHLIGHT_OPEN = (
+    "<div style=\"margin:28px 0;padding:24px;border-radius:14px;background:#eef2ff;text-align:center;\">"
+    "<span style=\"display:inline-block;font-size:30px;letter-spacing:8px;font-weight:600;color:#312e81;\">"
+)
+_BUTTON_STYLE = (
+    "display:inline-block;padding:14px 28px;border-radius:999px;background:#2563eb;"
+    "color:#ffffff;font-weight:600;text-decoration:none;"
+)
+_LIST_OPEN = (
+    "<ul style=\"padding-left:20px;margin:0 0 16px;line-height:1.6;color:#1e293b;font-size:16px;\">"
+)
+_LIST_ITEM_OPEN = "<li style=\"margin-bottom:8px;\">"
 
 
 def _paragraph(text: str) -> str:
-    return (
-        f'<p style="margin:0 0 16px;line-height:1.6;color:#1e293b;font-size:16px;">{_escape(text)}</p>'
-    )
+    return _PARAGRAPH_OPEN + _escape(text) + "</p>"
 
 
 def _highlight_block(content: str) -> str:
-    return (
-        "<div style=\"margin:28px 0;padding:24px;border-radius:14px;background:#eef2ff;text-align:center;\">"
-        f"<span style=\"display:inline-block;font-size:30px;letter-spacing:8px;font-weight:600;color:#312e81;\">{_escape(content)}" "</span>"
-        "</div>"
-    )
+    return _HIGHLIGHT_OPEN + _escape(content) + "</span></div>"
 
 
 def _button(label: str, url: str) -> str:
     return (
-        "<div style=\"margin-top:24px;\">"
-        f"<a href=\"{_escape(url)}\" style=\"display:inline-block;padding:14px 28px;border-radius:999px;background:#2563eb;color:#ffffff;font-weight:600;text-decoration:none;\">{_escape(label)}</a>"
-        "</div>"
+        f"<div style=\"margin-top:24px;\"><a href=\"{_escape(url)}\" style=\"{_BUTTON_STYLE}\">"
+        f"{_escape(label)}</a></div>"
     )
 
 
 def _unordered_list(items: Iterable[str]) -> str:
-    list_items = "".join(
-        f"<li style=\"margin-bottom:8px;\">{_escape(item)}" "</li>" for item in items
-    )
     return (
-        "<ul style=\"padding-left:20px;margin:0 0 16px;line-height:1.6;color:#1e293b;font-size:16px;\">"
-        f"{list_items}" "</ul>"
+        _LIST_OPEN
+        + "".join(_LIST_ITEM_OPEN + _escape(item) + "</li>" for item in items)
+        + "</ul>"
     )
 
 
+_TEXT_FOOTER = (
+    "Need help? Email contact@trackyoursheets.com.\n"
+    "Follow @trackyoursheets on Instagram for automation tips."
+)
+
+
 def _plain_text_with_footer(lines: Iterable[str]) -> str:
     output = list(lines)
     if output and output[-1] != "":
         output.append("")
-    output.append("Need help? Email contact@trackyoursheets.com.")
-    output.append("Follow @trackyoursheets on Instagram for automation tips.")
+    output.append(_TEXT_FOOTER)
     return "\n".join(output)
 
 
+# Plain-text bodies with a fixed shape are rendered once at import and only
+# the variable parts are formatted per send.
+_INVITE_TEXT_TEMPLATE = _plain_text_with_footer(
+    [
+        "{intro}{details}",
+        "",
+        "Temporary password:",
+        "{temporary_password}",
+        "",
+        "Sign in with your email, then set a new password when prompted.",
+        "{login_url}",
+    ]
+)
+
+_INVITE_PASSWORD_HTML = _paragraph(
+    "Use the temporary password below to sign in and you'll be prompted to create your own."
+)
+_INVITE_CLOSING_HTML = _paragraph("Keep this password safe—it expires once you update it.")
+_INVITE_GUIDE_HTML = _paragraph(
+    "Need a refresher? Explore the in-app How-To guide for imports, payouts, workspace chat, payroll tracking, and office assignments."
+)
+
+_SIGNUP_WELCOME_TEXT_TEMPLATE = _plain_text_with_footer(
+    [
+        "Hi {email},",
+        "",
+        "Thanks for activating your TrackYourSheets subscription!",
+        "Your organisation, {org_name}, is ready to automate producer payouts, streamline imports, and collaborate in workspaces.",
+        "",
+        "Get started by:",
+        "- Adding your first workspace and agent",
+        "- Uploading a carrier statement to see the pipeline in action",
+        "- Inviting teammates from the admin console",
+        "",
+        "Reply to this email if you need a hand—our team is standing by.",
+    ]
+)
+
+_TWO_FACTOR_TEXT_TEMPLATE = _plain_text_with_footer(
+    [
+        "We received a request to verify your identity.",
+        "",
+        "Security code: {code}",
+        "",
+        "The code expires in 10 minutes. If you didn't request this, reset your password immediately.",
+    ]
+)
+
+_LOGIN_TEXT_TEMPLATE = _plain_text_with_footer(
+    [
+        "You successfully signed in to TrackYourSheets.{ip_line}",
+        "",
+        "If this wasn't you, reset your password and contact support.",
+    ]
+)
+
+_SIGNUP_ALERT_TEXT_TEMPLATE = _plain_text_with_footer(
+    [
+        "New organisation signup",
+        "",
+        "Organisation: {org_name}",
+        "User: {email}{plan_line}",
+    ]
+)
+
+
+_CARD_OPEN = (
+    "<div style=\"background:#f8fafc;padding:32px 0;\">"
+    "<div style=\"max-width:560px;margin:0 auto;padding:0 24px;font-family:'Inter',Arial,sans-serif;color:#0f172a;\">"
+    "<div style=\"background:#ffffff;border-radius:18px;padding:32px 32px 40px;box-shadow:0 22px 48px rgba(15,23,42,0.12);\">"
+    "<h1 style=\"font-size:24px;line-height:1.25;margin:0 0 18px;font-weight:600;color:#0f172a;\">"
+)
+_CARD_CLOSE = (
+    "</div>"
+    "<div style=\"text-align:center;font-size:13px;color:#475569;margin-top:24px;line-height:1.6;\">"
+    "<p style=\"margin:0;\">Questions? Email <a href=\"mailto:contact@trackyoursheets.com\" style=\"color:#2563eb;text-decoration:none;font-weight:500;\">contact@trackyoursheets.com</a>.</p>"
+    "<p style=\"margin:8px 0 0;\">Follow <a href=\"https://www.instagram.com/trackyoursheets\" style=\"color:#2563eb;text-decoration:none;font-weight:500;\">@trackyoursheets</a> on Instagram for automation tips.</p>"
+    "</div>"
+    "</div>"
+    "</div>"
+)
+
+
 def _email_card(title: str, body_parts: Iterable[str]) -> str:
-    content = "".join(body_parts)
-    return (
-        "<div style=\"background:#f8fafc;padding:32px 0;\">"
-        "<div style=\"max-width:560px;margin:0 auto;padding:0 24px;font-family:'Inter',Arial,sans-serif;color:#0f172a;\">"
-        "<div style=\"background:#ffffff;border-radius:18px;padding:32px 32px 40px;box-shadow:0 22px 48px rgba(15,23,42,0.12);\">"
-        f"<h1 style=\"font-size:24px;line-height:1.25;margin:0 0 18px;font-weight:600;color:#0f172a;\">{_escape(title)}</h1>"
-        f"{content}"
-        "</div>"
-        "<div style=\"text-align:center;font-size:13px;color:#475569;margin-top:24px;line-height:1.6;\">"
-        "<p style=\"margin:0;\">Questions? Email <a href=\"mailto:contact@trackyoursheets.com\" style=\"color:#2563eb;text-decoration:none;font-weight:500;\">contact@trackyoursheets.com</a>.</p>"
-        "<p style=\"margin:8px 0 0;\">Follow <a href=\"https://www.instagram.com/trackyoursheets\" style=\"color:#2563eb;text-decoration:none;font-weight:500;\">@trackyoursheets</a> on Instagram for automation tips.</p>"
-        "</div>"
-        "</div>"
-        "</div>"
-    )
+    return "".join((_CARD_OPEN, _escape(title), "</h1>", *body_parts, _CARD_CLOSE))
+
+
+# Definite verdicts rarely change; unknown results are retried sooner.
+_VERIFY_CACHE_TTL = 86400.0
+_VERIFY_UNKNOWN_TTL = 300.0
+_VERIFY_CACHE_MAX_ENTRIES = 4096
+_verify_cache: dict[str, tuple[float, Optional[bool]]] = {}
+_verify_cache_lock = threading.Lock()
 
 
 def verify_email_deliverability(address: str) -> Optional[bool]:
+    address = _canonical_email(address)
     if not address:
         return None
     config = _resend_config()
-    api_key = config.get("api_key")
-    if not api_key:
+    if not config.api_key:
         return None
+
+    now = time.monotonic()
+    with _verify_cache_lock:
+        entry = _verify_cache.get(address)
+        if entry and entry[0] > now:
+            return entry[1]
+
+    verdict = _request_deliverability(address, config)
+
+    ttl = _VERIFY_UNKNOWN_TTL if verdict is None else _VERIFY_CACHE_TTL
+    with _verify_cache_lock:
+        if len(_verify_cache) >= _VERIFY_CACHE_MAX_ENTRIES:
+            for stale in [k for k, (expires, _) in _verify_cache.items() if expires <= now]:
+                del _verify_cache[stale]
+            if len(_verify_cache) >= _VERIFY_CACHE_MAX_ENTRIES:
+                del _verify_cache[min(_verify_cache, key=lambda k: _verify_cache[k][0])]
+        _verify_cache[address] = (now + ttl, verdict)
+    return verdict
+
+
+def _request_deliverability(address: str, config: _ResendConfig) -> Optional[bool]:
     try:
-        response = requests.post(
-            "https://api.resend.com/emails/verify",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json={"email": address},
-            timeout=5,
+        response = _http_session.post(
+            _RESEND_VERIFY_URL,
+            headers=_auth_headers(config.api_key),
+            data=_json_bytes({"email": address}),
+            timeout=config.timeout,
         )
     except Exception:
         return None
@@ -223,9 +662,9 @@ def verify_email_deliverability(address: str) -> Optional[bool]:
 
 def _send_email(
     *,
-    recipients: Sequence[EmailRecipient],
+    recipients: Iterable[EmailRecipient],
     subject: str,
-    body: str,
+    body: Optional[str] = None,
     sender_email: Optional[str] = None,
     sender_name: Optional[str] = None,
     reply_to: Optional[Sequence[EmailRecipient]] = None,
@@ -234,80 +673,84 @@ def _send_email(
     text_body: Optional[str] = None,
     html_body: Optional[str] = None,
     metadata: Optional[Mapping[str, object]] = None,
+    per_recipient: bool = False,
 ) -> bool:
+    """Build the Resend payload and queue it for delivery.
+
+    Callers pass either ``body`` (plain text, or HTML with ``is_html``) or
+    pre-rendered ``text_body``/``html_body``. With ``per_recipient`` each
+    address gets its own copy so recipients never see one another; the
+    copies are submitted together as a batch.
+    """
+
     if not recipients:
         return False
 
-    config = _resend_config()
-    api_key = config.get("api_key")
-    from_email = sender_email or config.get("from_email")
-    if not api_key or not from_email:
-        current_app.logger.info(
-            "Skipping Resend send; configuration incomplete.",
-            extra={
-                "has_api_key": bool(api_key),
-                "has_from": bool(from_email),
-            },
-        )
+    if not _is_configured(sender_email):
         return False
 
-    to_payload = _normalize_recipients(recipients)
-    if not to_payload:
-        return False
+    config = _resend_config()
+    from_email = sender_email or config.from_email
 
-    resend.api_key = api_key
+    to_emails = _normalize_recipients(recipients)
+    if not to_emails:
+        return False
 
-    sender_identity = sender_name or config.get("from_name") or "TrackYourSheets"
+    sender_identity = sender_name or config.from_name or "TrackYourSheets"
     sender = _build_sender(from_email, sender_identity)
 
-    params: dict[str, object] = {
-        "from": sender,
-        "to": [entry["email"] for entry in to_payload],
-        "subject": subject,
-    }
+    tags = (
+        [
+            {"name": str(key), "value": value if isinstance(value, str) else str(value)}
+            for key, value in metadata.items()
+            if value is not None
+        ]
+        if metadata
+        else None
+    )
 
     if html_body:
-        params["html"] = html_body
-    elif is_html:
-        params["html"] = body
+        html = html_body
+    elif body is not None:
+        html = body if is_html else _as_html(body)
     else:
-        params["html"] = _as_html(body)
+        html = None
+
+    params: dict[str, object] = {
+        key: value
+        for key, value in (
+            ("from", sender),
+            ("to", to_emails),
+            ("subject", subject),
+            ("html", html),
+            ("text", body if text_body is None else text_body),
+            (
+                "reply_to",
+                (_normalize_recipients(reply_to) if reply_to else list(config.reply_to))
+                or None,
+            ),
+            ("tags", tags or None),
+            ("scheduled_at", send_at or None),
+        )
+        if value is not None
+    }
 
-    if text_body is not None:
-        params["text"] = text_body
+    if per_recipient and len(to_emails) > 1:
+        messages = [{**params, "to": [email]} for email in to_emails]
     else:
-        params["text"] = body
-
-    effective_reply_to: list[EmailRecipient] = []
-    if reply_to:
-        effective_reply_to.extend(reply_to)
-    elif config.get("reply_to"):
-        effective_reply_to.extend(config["reply_to"])
-    if effective_reply_to:
-        reply_to_payload = _normalize_recipients(effective_reply_to)
-        if reply_to_payload:
-            params["reply_to"] = [entry["email"] for entry in reply_to_payload]
-
-    if metadata:
-        tags: list[dict[str, str]] = []
-        for key, value in metadata.items():
-            if value is None:
-                continue
-            tags.append({"name": str(key), "value": str(value)})
-        if tags:
-            params["tags"] = tags
+        messages = [params]
 
+    # The batch endpoint does not support scheduled delivery, so those go out
+    # one request per message.
     if send_at:
-        params["scheduled_at"] = send_at
+        return all([_dispatch([message]) for message in messages])
 
-    _throttle_email_sends()
+    ctx: Optional[_BatchContext] = getattr(_batch_state, "context", None)
+    if ctx is not None:
+        ctx.pending.extend(messages)
+        return True
 
-    try:
-        resend.Emails.send(params)  # type: ignore[arg-type]
-    except Exception as exc:  # pragma: no cover - network failures logged only
-        current_app.logger.warning("Resend send error", exc_info=exc)
-        return False
-    return True
+    return _dispatch(messages)
 
 
 def send_notification_email(
@@ -318,14 +761,11 @@ def send_notification_email(
     include_default_recipients: bool = True,
     metadata: Optional[Mapping[str, object]] = None,
 ) -> bool:
-    config = _resend_config()
-    target_list: list[EmailRecipient] = list(recipients or [])
-    if include_default_recipients:
-        target_list.extend(config.get("default_notifications", []))
-    if not target_list:
+    defaults = _resend_config().default_notifications if include_default_recipients else ()
+    if not recipients and not defaults:
         return False
     return _send_email(
-        recipients=target_list,
+        recipients=chain(recipients or (), defaults),
         subject=subject,
         body=body,
         metadata=metadata,
@@ -334,101 +774,94 @@ def send_notification_email(
 
 def send_import_notification(
     recipients: Sequence[EmailRecipient],
-    workspace,
-    uploader,
+    *,
+    workspace_id: Optional[int],
+    workspace_name: str,
+    office_name: Optional[str],
+    uploader_email: Optional[str],
+    uploader_name: Optional[str],
     period: str,
     summary: Iterable[Mapping[str, object]],
 ) -> None:
-    """Send a summary email when a statement import is uploaded."""
+    """Send a summary email when a statement import is uploaded.
 
-    if not recipients:
+    Only plain values are accepted so the email can be rendered without
+    touching ORM relationships.
+    """
+
+    if not recipients or not _is_configured():
         return
 
-    subject = f"New commission import for {workspace.name}"
-    office_name = workspace.office.name if getattr(workspace, "office", None) else ""
+    subject = f"New commission import for {workspace_name}"
+    uploaded_by = uploader_email or "Unknown uploader"
 
-    lines = [
-        f"Workspace: {workspace.name}",
-        *([f"Office: {office_name}"] if office_name else []),
-        f"Uploaded by: {getattr(uploader, 'email', 'Unknown uploader')}",
-        f"Statement period: {period}",
-    ]
     summary_items = []
     for item in summary:
         carrier = item.get("carrier", "Unspecified")
         rows = item.get("rows", 0)
         summary_items.append(f"{carrier}: {rows} row(s)")
 
-    uploader_name = (
-        getattr(uploader, "display_name_for_ui", None)
-        or getattr(uploader, "email", None)
-        or ""
-    )
-
-    reply_to: Optional[list[EmailRecipient]] = None
-    if getattr(uploader, "email", None):
-        reply_to = [getattr(uploader, "email", "")]
+    reply_to: Optional[list[EmailRecipient]] = [uploader_email] if uploader_email else None
 
     html_parts = [
         _paragraph("A new commission import is ready for review."),
-        _paragraph(f"Workspace: {workspace.name}"),
+        _paragraph(f"Workspace: {workspace_name}"),
     ]
     if office_name:
         html_parts.append(_paragraph(f"Office: {office_name}"))
     html_parts.append(
         _paragraph(
-            f"Uploaded by {getattr(uploader, 'email', 'Unknown uploader')} for period {period}."
+            f"Uploaded by {uploaded_by} for period {period}."
         )
     )
     if summary_items:
         html_parts.append(_paragraph("Carrier breakdown:"))
         html_parts.append(_unordered_list(summary_items))
-    text_lines = [
-        f"A new commission import is ready for review in {workspace.name}.",
-        *([f"Office: {office_name}"] if office_name else []),
-        f"Uploaded by: {getattr(uploader, 'email', 'Unknown uploader')}",
-        f"Statement period: {period}",
-    ]
+    buffer = io.StringIO()
+    buffer.write(f"A new commission import is ready for review in {workspace_name}.\n")
+    if office_name:
+        buffer.write(f"Office: {office_name}\n")
+    buffer.write(f"Uploaded by: {uploaded_by}\n")
+    buffer.write(f"Statement period: {period}\n")
     if summary_items:
-        text_lines.append("")
-        text_lines.append("Carrier breakdown:")
-        text_lines.extend(f"- {item}" for item in summary_items)
-    text_body = _plain_text_with_footer(text_lines)
+        buffer.write("\nCarrier breakdown:\n")
+        buffer.writelines(f"- {item}\n" for item in summary_items)
+    buffer.write("\n")
+    buffer.write(_TEXT_FOOTER)
+    text_body = buffer.getvalue()
     html_body = _email_card(subject, html_parts)
 
     _send_email(
         recipients=recipients,
         subject=subject,
-        body=text_body,
         text_body=text_body,
         html_body=html_body,
         sender_name=f"{uploader_name} via TrackYourSheets" if uploader_name else None,
         reply_to=reply_to,
         metadata={
-            "workspace_id": getattr(workspace, "id", None),
+            "workspace_id": workspace_id,
             "period": period,
         },
-        is_html=True,
+        per_recipient=True,
     )
 
 
 def send_workspace_invitation(
     recipient: str,
-    inviter,
-    workspace=None,
-    role: str | None = None,
     *,
+    inviter_email: Optional[str],
+    inviter_display: Optional[str],
+    workspace_id: Optional[int] = None,
+    workspace_name: Optional[str] = None,
+    office_id: Optional[int] = None,
+    office_name: Optional[str] = None,
+    role: str | None = None,
     temporary_password: str,
     login_url: str,
 ) -> None:
-    inviter_display = (
-        getattr(inviter, "display_name_for_ui", None)
-        or getattr(inviter, "email", None)
-        or ""
-    )
+    if not recipient or not _is_configured():
+        return
     inviter_name = inviter_display or "A teammate"
-    workspace_name = getattr(workspace, "name", None)
-    office_name = getattr(getattr(workspace, "office", None), "name", None)
     if workspace_name:
         subject = f"You're invited to {workspace_name} on TrackYourSheets"
         intro = f"{inviter_name} invited you to join the {workspace_name} workspace."
@@ -440,62 +873,51 @@ def send_workspace_invitation(
         )
 
     html_parts = [
-        _paragraph(intro),
-        _paragraph(f"Role: {role.title()}") if role else "",
-    ]
-    if office_name:
-        html_parts.append(
+        part
+        for part in (
+            _paragraph(intro),
+            _paragraph(f"Role: {role.title()}") if role else None,
             _paragraph(
                 f"Primary office: {office_name}. You can join additional offices once you're signed in."
             )
-        )
-    html_parts.extend(
-        [
-            _paragraph(
-                "Use the temporary password below to sign in and you'll be prompted to create your own."
-            ),
+            if office_name
+            else None,
+            _INVITE_PASSWORD_HTML,
             _highlight_block(temporary_password),
-            _paragraph("Keep this password safe—it expires once you update it."),
+            _INVITE_CLOSING_HTML,
             _button("Open TrackYourSheets", login_url),
-        ]
-    )
-    html_parts = [part for part in html_parts if part]
-    html_parts.append(
-        _paragraph(
-            "Need a refresher? Explore the in-app How-To guide for imports, payouts, workspace chat, payroll tracking, and office assignments."
+            _INVITE_GUIDE_HTML,
         )
-    )
+        if part is not None
+    ]
     text_intro = (
         f"{inviter_name} invited you to join the {workspace_name} workspace on TrackYourSheets."
         if workspace_name
         else f"{inviter_name} invited you to TrackYourSheets. Join offices and workspaces after you sign in."
     )
-    text_lines = [
-        text_intro,
-        f"Role: {role.title()}" if role else None,
-        (f"Primary office: {office_name}" if office_name else None),
-        "",  # spacer
-        "Temporary password:",
-        temporary_password,
-        "",
-        "Sign in with your email, then set a new password when prompted.",
-        login_url,
-    ]
-    text_lines = [line for line in text_lines if line is not None]
-    text_body = _plain_text_with_footer(text_lines)
+    details = "".join(
+        f"\n{line}"
+        for line in (
+            f"Role: {role.title()}" if role else None,
+            f"Primary office: {office_name}" if office_name else None,
+        )
+        if line is not None
+    )
+    text_body = _INVITE_TEXT_TEMPLATE.format(
+        intro=text_intro,
+        details=details,
+        temporary_password=temporary_password,
+        login_url=login_url,
+    )
     html_body = _email_card(subject, html_parts)
 
-    reply_to: Optional[list[EmailRecipient]] = None
-    if getattr(inviter, "email", None):
-        reply_to = [getattr(inviter, "email", "")]
+    reply_to: Optional[list[EmailRecipient]] = [inviter_email] if inviter_email else None
 
     _send_email(
         recipients=[recipient],
         subject=subject,
-        body=text_body,
         text_body=text_body,
         html_body=html_body,
-        is_html=True,
         sender_name=(
             f"{inviter_display} via TrackYourSheets"
             if inviter_display
@@ -503,34 +925,19 @@ def send_workspace_invitation(
         ),
         reply_to=reply_to,
         metadata={
-            "workspace_id": getattr(workspace, "id", None),
+            "workspace_id": workspace_id,
             "role": role,
-            "office_id": getattr(getattr(workspace, "office", None), "id", None)
-            if workspace
-            else None,
+            "office_id": office_id,
         },
     )
 
 
 def send_signup_welcome(user, organization) -> None:
-    if not getattr(user, "email", None):
+    if not getattr(user, "email", None) or not _is_configured():
         return
     org_name = getattr(organization, "name", "TrackYourSheets")
     subject = "Welcome to TrackYourSheets"
-    text_lines = [
-        f"Hi {user.email},",
-        "",
-        "Thanks for activating your TrackYourSheets subscription!",
-        f"Your organisation, {org_name}, is ready to automate producer payouts, streamline imports, and collaborate in workspaces.",
-        "",
-        "Get started by:",
-        "- Adding your first workspace and agent",
-        "- Uploading a carrier statement to see the pipeline in action",
-        "- Inviting teammates from the admin console",
-        "",
-        "Reply to this email if you need a hand—our team is standing by.",
-    ]
-    text_body = _plain_text_with_footer(text_lines)
+    text_body = _SIGNUP_WELCOME_TEXT_TEMPLATE.format(email=user.email, org_name=org_name)
     html_parts = [
         _paragraph(f"Hi {user.email},"),
         _paragraph(
@@ -550,67 +957,51 @@ def send_signup_welcome(user, organization) -> None:
     _send_email(
         recipients=[user.email],
         subject=subject,
-        body=text_body,
         text_body=text_body,
         html_body=html_body,
-        is_html=True,
     )
 
 
 def send_signup_alert(user, organization) -> None:
-    config = _resend_config()
-    recipients = config.get("signup_alerts", [])
-    if not recipients:
+    recipients = _resend_config().signup_alerts
+    if not recipients or not _is_configured():
         return
     org_name = getattr(organization, "name", "Unknown org")
-    lines = [
-        "New organisation signup",
-        "",
-        f"Organisation: {org_name}",
-        f"User: {getattr(user, 'email', 'Unknown user')}",
-    ]
-    if getattr(organization, "plan", None):
-        lines.append(f"Selected plan: {organization.plan.name}")
-    text_body = _plain_text_with_footer(lines)
+    user_email = getattr(user, "email", "Unknown user")
+    plan = getattr(organization, "plan", None)
+    plan_line = f"Selected plan: {plan.name}" if plan else None
+    subject = f"New TrackYourSheets signup: {org_name}"
+    text_body = _SIGNUP_ALERT_TEXT_TEMPLATE.format(
+        org_name=org_name,
+        email=user_email,
+        plan_line=f"\n{plan_line}" if plan_line else "",
+    )
     html_parts = [
         _paragraph("New organisation signup"),
         _unordered_list(
             [
                 f"Organisation: {org_name}",
-                f"User: {getattr(user, 'email', 'Unknown user')}",
-                *(
-                    [f"Selected plan: {organization.plan.name}"]
-                    if getattr(organization, "plan", None)
-                    else []
-                ),
+                f"User: {user_email}",
+                *([plan_line] if plan_line else []),
             ]
         ),
     ]
-    html_body = _email_card(title=f"New TrackYourSheets signup: {org_name}", body_parts=html_parts)
+    html_body = _email_card(title=subject, body_parts=html_parts)
 
     _send_email(
         recipients=recipients,
-        subject=f"New TrackYourSheets signup: {org_name}",
-        body=text_body,
+        subject=subject,
         text_body=text_body,
         html_body=html_body,
-        is_html=True,
         metadata={"org_id": getattr(organization, "id", None)},
     )
 
 
 def send_two_factor_code_email(email: str, code: str, *, intent: str) -> None:
-    if not email:
+    if not email or not _is_configured():
         return
     subject = f"TrackYourSheets security code ({intent.title()})"
-    text_lines = [
-        "We received a request to verify your identity.",
-        "",
-        f"Security code: {code}",
-        "",
-        "The code expires in 10 minutes. If you didn't request this, reset your password immediately.",
-    ]
-    text_body = _plain_text_with_footer(text_lines)
+    text_body = _TWO_FACTOR_TEXT_TEMPLATE.format(code=code)
     html_parts = [
         _paragraph("We received a request to verify your identity."),
         _highlight_block(code),
@@ -620,29 +1011,21 @@ def send_two_factor_code_email(email: str, code: str, *, intent: str) -> None:
     _send_email(
         recipients=[email],
         subject=subject,
-        body=text_body,
         text_body=text_body,
         html_body=html_body,
-        is_html=True,
         metadata={"purpose": f"2fa-{intent}"},
     )
 
 
 def send_login_notification(email: str, *, ip_address: Optional[str] = None) -> None:
-    if not email:
+    if not email or not _is_configured():
         return
-    lines = [
-        "You successfully signed in to TrackYourSheets.",
-    ]
-    if ip_address:
-        lines.append(f"Sign-in from: {ip_address}")
-    lines.extend(
-        [
-            "",
-            "If this wasn't you, reset your password and contact support.",
-        ]
+    dedupe_key = _recent_send_key("login", canonical_email_key(email), ip_address)
+    if not _claim_recent_send(dedupe_key):
+        return
+    text_body = _LOGIN_TEXT_TEMPLATE.format(
+        ip_line=f"\nSign-in from: {ip_address}" if ip_address else ""
     )
-    text_body = _plain_text_with_footer(lines)
     html_parts = [
         _paragraph("You successfully signed in to TrackYourSheets."),
     ]
@@ -652,15 +1035,14 @@ def send_login_notification(email: str, *, ip_address: Optional[str] = None) ->
         _paragraph("If this wasn't you, reset your password immediately and let us know.")
     )
     html_body = _email_card("TrackYourSheets login confirmation", html_parts)
-    _send_email(
+    if not _send_email(
         recipients=[email],
         subject="TrackYourSheets login confirmation",
-        body=text_body,
         text_body=text_body,
         html_body=html_body,
-        is_html=True,
         metadata={"purpose": "login-alert"},
-    )
+    ):
+        _release_recent_send(dedupe_key)
 
 
 def send_workspace_update_notification(
@@ -670,16 +1052,19 @@ def send_workspace_update_notification(
     actor,
     summary: str,
 ) -> None:
-    if not recipients:
+    if not recipients or not _is_configured():
         return
     actor_name = (
         getattr(actor, "display_name_for_ui", None)
         or getattr(actor, "email", None)
         or "A teammate"
     )
-    summary_lines = [line.strip() for line in (summary or "").splitlines() if line.strip()]
+    workspace_name = workspace.name
+    subject = f"Workspace activity: {workspace_name}"
+    headline = f"{actor_name} updated the {workspace_name} workspace."
+    summary_lines = [line for line in map(str.strip, (summary or "").splitlines()) if line]
     text_lines = [
-        f"{actor_name} updated the {workspace.name} workspace.",
+        headline,
         "",
         *(summary_lines or [summary or ""]),
         "",
@@ -687,26 +1072,21 @@ def send_workspace_update_notification(
     ]
     text_body = _plain_text_with_footer(text_lines)
     html_parts = [
-        _paragraph(f"{actor_name} updated the {workspace.name} workspace."),
+        _paragraph(headline),
+        *map(_paragraph, summary_lines or [summary]),
+        _paragraph("Visit your dashboard to review the latest changes."),
     ]
-    if summary_lines:
-        for line in summary_lines:
-            html_parts.append(_paragraph(line))
-    else:
-        html_parts.append(_paragraph(summary))
-    html_parts.append(_paragraph("Visit your dashboard to review the latest changes."))
-    html_body = _email_card(f"Workspace activity: {workspace.name}", html_parts)
+    html_body = _email_card(subject, html_parts)
     _send_email(
         recipients=recipients,
-        subject=f"Workspace activity: {workspace.name}",
-        body=text_body,
+        subject=subject,
         text_body=text_body,
         html_body=html_body,
-        is_html=True,
         metadata={
             "workspace_id": getattr(workspace, "id", None),
             "purpose": "workspace-update",
         },
+        per_recipient=True,
     )
 
 
@@ -717,16 +1097,19 @@ def send_workspace_chat_notification(
     actor,
     message: str,
 ) -> None:
-    if not recipients:
+    if not recipients or not _is_configured():
         return
     actor_name = (
         getattr(actor, "display_name_for_ui", None)
         or getattr(actor, "email", None)
         or "A teammate"
     )
-    message_lines = [line.strip() for line in (message or "").splitlines() if line.strip()]
+    workspace_name = workspace.name
+    subject = f"New workspace message: {workspace_name}"
+    headline = f"{actor_name} posted a new message in {workspace_name}."
+    message_lines = [line for line in map(str.strip, (message or "").splitlines()) if line]
     text_lines = [
-        f"{actor_name} posted a new message in {workspace.name}.",
+        headline,
         "",
         *(message_lines or [message or ""]),
         "",
@@ -734,24 +1117,19 @@ def send_workspace_chat_notification(
     ]
     text_body = _plain_text_with_footer(text_lines)
     html_parts = [
-        _paragraph(f"{actor_name} posted a new message in {workspace.name}."),
+        _paragraph(headline),
+        *map(_paragraph, message_lines or [message]),
+        _paragraph("Reply from TrackYourSheets to keep momentum going."),
     ]
-    if message_lines:
-        for line in message_lines:
-            html_parts.append(_paragraph(line))
-    else:
-        html_parts.append(_paragraph(message))
-    html_parts.append(_paragraph("Reply from TrackYourSheets to keep momentum going."))
-    html_body = _email_card(f"New workspace message: {workspace.name}", html_parts)
+    html_body = _email_card(subject, html_parts)
     _send_email(
         recipients=recipients,
-        subject=f"New workspace message: {workspace.name}",
-        body=text_body,
+        subject=subject,
         text_body=text_body,
         html_body=html_body,
-        is_html=True,
         metadata={
             "workspace_id": getattr(workspace, "id", None),
             "purpose": "workspace-chat",
         },
+        per_recipient=True,
     )
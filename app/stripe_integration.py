@@ -1,11 +1,15 @@
 """Stripe integration helpers for TrackYourSheets."""
 from __future__ import annotations
-from dotenv import load_dotenv
-load_dotenv()
 
+import hashlib
+import json
 import os
+import threading
+import time
+from dataclasses import dataclass
 from decimal import Decimal, InvalidOperation
-from typing import Dict, Optional
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
 
 from flask import current_app
 
@@ -15,9 +19,73 @@ from flask import Flask
 from . import db
 from .models import Organization, SubscriptionPlan, User
 
+# Prices rarely change, so snapshots live for a day. Failed lookups are
+# remembered briefly so a Stripe outage doesn't add a slow API call to every
+# pricing page render.
+_PRICE_CACHE_TTL = 86400.0
+_PRICE_FAILURE_TTL = 60.0
+
+PLAN_CODES = ("STARTER", "GROWTH", "SCALE")
+
+# Idempotency keys are bucketed by time so a double submit or a retried
+# request reuses the same Stripe object, while a later attempt with the same
+# parameters (or a different environment sharing the account) gets a fresh one.
+_IDEMPOTENCY_WINDOW = 600
+
+
+@dataclass(frozen=True, slots=True)
+class PriceSnapshot:
+    """Immutable Stripe price details, safe to share from the cache."""
+
+    price_id: str
+    amount_decimal: Optional[Decimal]
+    currency: str
+    interval: str
+    label: Optional[str]
+
+    @classmethod
+    def from_price(cls, price_id: str, price) -> "PriceSnapshot":
+        """Build a snapshot from a Stripe ``Price`` object."""
+
+        unit_amount = getattr(price, "unit_amount", None)
+        unit_amount_decimal = getattr(price, "unit_amount_decimal", None)
+        amount_decimal = None
+        if unit_amount is not None:
+            amount_decimal = Decimal(unit_amount) / Decimal(100)
+        elif unit_amount_decimal:
+            try:
+                amount_decimal = Decimal(unit_amount_decimal) / Decimal(100)
+            except (TypeError, InvalidOperation):  # pragma: no cover - depends on Stripe payload
+                amount_decimal = None
+
+        currency = (getattr(price, "currency", "") or "usd").upper()
+        interval = None
+        recurring = getattr(price, "recurring", None)
+        if recurring:
+            interval = getattr(recurring, "interval", None) or recurring.get("interval")
+
+        label = None
+        if amount_decimal is not None:
+            if currency == "USD":
+                label = f"${amount_decimal:,.2f}"
+            else:
+                label = f"{amount_decimal:,.2f} {currency}"
+
+        return cls(
+            price_id=price_id,
+            amount_decimal=amount_decimal,
+            currency=currency,
+            interval=interval or "month",
+            label=label,
+        )
+
 
 class StripeGateway:
-    """Lightweight wrapper around the Stripe SDK."""
+    """Lightweight wrapper around the Stripe SDK.
+
+    Credentials are passed on each API call rather than through the
+    module-level ``stripe.api_key``, so gateways never race each other.
+    """
 
     def __init__(
         self,
@@ -31,9 +99,7 @@ class StripeGateway:
         self.publishable_key = publishable_key
         self.mode = mode
         self.price_ids = {k.lower(): v for k, v in (price_ids or {}).items() if v}
-        if self.secret_key:
-            stripe.api_key = self.secret_key
-        self._price_cache: Dict[str, Dict[str, object]] = {}
+        self._price_cache: Dict[str, tuple[float, Optional[PriceSnapshot]]] = {}
 
     @property
     def is_configured(self) -> bool:
@@ -49,60 +115,78 @@ class StripeGateway:
         key = plan.name if isinstance(plan, SubscriptionPlan) else str(plan)
         return self.price_ids.get(key.lower())
 
-    def plan_pricing(self, plan: SubscriptionPlan | str) -> Optional[Dict[str, object]]:
+    def plan_pricing(self, plan: SubscriptionPlan | str) -> Optional[PriceSnapshot]:
         """Return Stripe pricing metadata for a plan, cached per price ID."""
 
         price_id = self._resolve_price(plan)
         if not price_id or not self.secret_key:
             return None
 
+        now = time.monotonic()
         cached = self._price_cache.get(price_id)
-        if cached:
-            return cached
+        if cached and cached[0] > now:
+            return cached[1]
 
         try:
-            stripe.api_key = self.secret_key
-            price = stripe.Price.retrieve(price_id, expand=["product"])  # type: ignore[arg-type]
+            price = stripe.Price.retrieve(price_id, api_key=self.secret_key, expand=["product"])  # type: ignore[arg-type]
         except Exception as exc:  # pragma: no cover - Stripe failures are logged only
             logger = getattr(current_app, "logger", None)
             if logger:
                 logger.warning("Unable to retrieve Stripe price", exc_info=exc, extra={"price_id": price_id})
+            self._price_cache[price_id] = (now + _PRICE_FAILURE_TTL, None)
             return None
 
-        unit_amount = getattr(price, "unit_amount", None)
-        unit_amount_decimal = getattr(price, "unit_amount_decimal", None)
-        amount_decimal = None
-        if unit_amount is not None:
-            amount_decimal = Decimal(unit_amount) / Decimal(100)
-        elif unit_amount_decimal:
-            try:
-                amount_decimal = Decimal(unit_amount_decimal) / Decimal(100)
-            except (TypeError, InvalidOperation):  # pragma: no cover - depends on Stripe payload
-                amount_decimal = None
+        snapshot = PriceSnapshot.from_price(price_id, price)
+        self._price_cache[price_id] = (now + _PRICE_CACHE_TTL, snapshot)
+        return snapshot
 
-        currency = (getattr(price, "currency", "") or "usd").upper()
-        interval = None
-        recurring = getattr(price, "recurring", None)
-        if recurring:
-            interval = getattr(recurring, "interval", None) or recurring.get("interval")
+    def plan_pricing_bulk(self, plans: Iterable[SubscriptionPlan | str]) -> Dict[str, PriceSnapshot]:
+        """Return pricing for several plans keyed by lower-cased plan name.
 
-        label = None
-        if amount_decimal is not None:
-            if currency == "USD":
-                label = f"${amount_decimal:,.2f}"
-            else:
-                label = f"{amount_decimal:,.2f} {currency}"
+        Stripe can't list prices by ID, so uncached prices are picked out of
+        one listing of active prices; anything not found there falls back to
+        an individual lookup.
+        """
 
-        snapshot = {
-            "price_id": price_id,
-            "amount_decimal": amount_decimal,
-            "currency": currency,
-            "interval": interval or "month",
-            "label": label,
+        if not self.secret_key:
+            return {}
+
+        plan_prices: Dict[str, str] = {}
+        for plan in plans:
+            key = (plan.name if isinstance(plan, SubscriptionPlan) else str(plan)).lower()
+            price_id = self.price_ids.get(key)
+            if price_id:
+                plan_prices[key] = price_id
+
+        now = time.monotonic()
+        missing = {
+            price_id
+            for price_id in plan_prices.values()
+            if not (price_id in self._price_cache and self._price_cache[price_id][0] > now)
         }
+        if len(missing) > 1:
+            try:
+                prices = stripe.Price.list(api_key=self.secret_key, active=True, limit=100)
+            except Exception as exc:  # pragma: no cover - Stripe failures are logged only
+                logger = getattr(current_app, "logger", None)
+                if logger:
+                    logger.warning("Unable to list Stripe prices", exc_info=exc)
+            else:
+                for price in prices.data:
+                    if price.id in missing:
+                        self._price_cache[price.id] = (now + _PRICE_CACHE_TTL, PriceSnapshot.from_price(price.id, price))
 
-        self._price_cache[price_id] = snapshot
-        return snapshot
+        pricing: Dict[str, PriceSnapshot] = {}
+        for key in plan_prices:
+            snapshot = self.plan_pricing(key)
+            if snapshot:
+                pricing[key] = snapshot
+        return pricing
+
+    def warm_price_cache(self) -> None:
+        """Fetch every configured plan price so the first pricing page is warm."""
+
+        self.plan_pricing_bulk(list(self.price_ids))
 
     def ensure_customer(self, organization: Organization) -> str:
         if not organization:
@@ -110,20 +194,28 @@ class StripeGateway:
         if organization.stripe_customer_id:
             return organization.stripe_customer_id
 
-        owner = next(
-            (
-                user
-                for user in organization.users
-                if user.role == "owner" and getattr(user, "email", None)
-            ),
-            None,
+        owner_email = (
+            db.session.query(User.email)
+            .filter(
+                User.org_id == organization.id,
+                User.role == "owner",
+                User.email.isnot(None),
+                User.email != "",
+            )
+            .limit(1)
+            .scalar()
         )
 
-        stripe.api_key = self.secret_key
+        params = {
+            "email": owner_email,
+            "name": organization.name,
+            "metadata": {"org_id": organization.id},
+        }
+        request_hash = _idempotency_request_hash(params)
         customer = stripe.Customer.create(
-            email=getattr(owner, "email", None),
-            name=organization.name,
-            metadata={"org_id": organization.id},
+            api_key=self.secret_key,
+            idempotency_key=f"cust:{organization.id}:{request_hash}",
+            **params,
         )
         organization.stripe_customer_id = customer.id
         db.session.add(organization)
@@ -148,7 +240,6 @@ class StripeGateway:
         if not price_id:
             raise RuntimeError(f"No Stripe price configured for plan '{plan.name}'")
 
-        stripe.api_key = self.secret_key
         customer_id = self.ensure_customer(organization)
         seat_quantity = max(int(quantity or 1), 1)
         metadata_payload: Dict[str, object] = {
@@ -167,33 +258,41 @@ class StripeGateway:
         if subscription_metadata:
             subscription_metadata_payload.update(subscription_metadata)
 
-        session = stripe.checkout.Session.create(
-            mode="subscription",
-            customer=customer_id,
-            billing_address_collection="auto",
-            allow_promotion_codes=True,
-            automatic_tax={"enabled": True},
-            customer_update={"address": "auto"},
-            line_items=[{"price": price_id, "quantity": seat_quantity}],
-            client_reference_id=client_reference_id,
-            metadata=metadata_payload,
-            subscription_data={
+        params: Dict[str, object] = {
+            "mode": "subscription",
+            "customer": customer_id,
+            "billing_address_collection": "auto",
+            "allow_promotion_codes": True,
+            "automatic_tax": {"enabled": True},
+            "customer_update": {"address": "auto"},
+            "line_items": [{"price": price_id, "quantity": seat_quantity}],
+            "client_reference_id": client_reference_id,
+            "metadata": metadata_payload,
+            "subscription_data": {
                 "metadata": subscription_metadata_payload,
             },
-            success_url=success_url,
-            cancel_url=cancel_url,
+            "success_url": success_url,
+            "cancel_url": cancel_url,
+        }
+        request_hash = _idempotency_request_hash(params)
+        session = stripe.checkout.Session.create(
+            api_key=self.secret_key,
+            idempotency_key=f"co:{organization.id}:{plan.name}:{request_hash}",
+            **params,
         )
         return session.url
 
-    def retrieve_checkout_session(self, session_id: str):
+    def retrieve_checkout_session(self, session_id: str, *, expand: Optional[List[str]] = None):
+        """Fetch a checkout session, expanding only the related objects requested."""
+
         if not session_id:
             raise ValueError("A Stripe checkout session ID is required")
         if not self.secret_key:
             raise RuntimeError("Stripe gateway is not configured")
-        stripe.api_key = self.secret_key
         return stripe.checkout.Session.retrieve(
             session_id,
-            expand=["subscription", "line_items"],
+            api_key=self.secret_key,
+            expand=expand or [],
         )
 
     def create_billing_portal_session(
@@ -204,9 +303,9 @@ class StripeGateway:
     ) -> str:
         if not self.is_configured:
             raise RuntimeError("Stripe gateway is not fully configured")
-        stripe.api_key = self.secret_key
         customer_id = self.ensure_customer(organization)
         session = stripe.billing_portal.Session.create(
+            api_key=self.secret_key,
             customer=customer_id,
             return_url=return_url,
         )
@@ -229,12 +328,12 @@ class StripeGateway:
         cents = int(amount_decimal.quantize(Decimal("0.01")) * 100)
         if cents <= 0:
             return None
-        stripe.api_key = self.secret_key
         payload_metadata = {"org_id": organization.id}
         if metadata:
             payload_metadata.update(metadata)
         try:
             payout = stripe.Payout.create(
+                api_key=self.secret_key,
                 amount=cents,
                 currency="usd",
                 description=memo or "Commission payroll",
@@ -256,6 +355,13 @@ class StripeGateway:
         }
 
 
+def _idempotency_request_hash(params: Dict[str, object]) -> str:
+    window = int(time.time() // _IDEMPOTENCY_WINDOW)
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(f"{window}:{payload}".encode("utf-8")).hexdigest()[:32]
+
+
+@lru_cache(maxsize=None)
 def _resolve_price_id(mode: str, plan_code: str) -> Optional[str]:
     candidates = []
     if mode == "live":
@@ -270,6 +376,37 @@ def _resolve_price_id(mode: str, plan_code: str) -> Optional[str]:
     return None
 
 
+def invalidate_price_ids() -> None:
+    """Forget resolved price IDs, e.g. after tests change the environment."""
+
+    _resolve_price_id.cache_clear()
+
+
+def _configure_stripe_client() -> None:
+    """Bound Stripe network calls so a slow API can't pin a worker.
+
+    The SDK's default read timeout is 80 seconds; calls run inside the
+    request, so cap them and let the SDK retry transient failures instead.
+    """
+
+    stripe.max_network_retries = int(os.environ.get("STRIPE_MAX_RETRIES") or 2)
+    connect_timeout = float(os.environ.get("STRIPE_CONNECT_TIMEOUT") or 5)
+    read_timeout = float(os.environ.get("STRIPE_READ_TIMEOUT") or 25)
+    stripe.default_http_client = stripe.RequestsClient(
+        timeout=(connect_timeout, read_timeout)
+    )
+
+
+def _start_price_warmup(app: Flask, gateway: StripeGateway) -> None:
+    """Load plan prices in the background so startup never waits on Stripe."""
+
+    def warm() -> None:
+        with app.app_context():
+            gateway.warm_price_cache()
+
+    threading.Thread(target=warm, name="stripe-price-warmup", daemon=True).start()
+
+
 def init_stripe(app: Flask) -> None:
     """Initialise the Stripe gateway based on environment variables."""
 
@@ -284,11 +421,9 @@ def init_stripe(app: Flask) -> None:
         secret_key = secret_key or os.environ.get("STRIPE_TEST_SECRET_KEY")
         publishable_key = publishable_key or os.environ.get("STRIPE_TEST_PUBLISHABLE_KEY")
 
-    price_ids = {
-        "starter": _resolve_price_id(mode, "STARTER"),
-        "growth": _resolve_price_id(mode, "GROWTH"),
-        "scale": _resolve_price_id(mode, "SCALE"),
-    }
+    _configure_stripe_client()
+
+    price_ids = {code.lower(): _resolve_price_id(mode, code) for code in PLAN_CODES}
 
     gateway = StripeGateway(
         secret_key=secret_key,
@@ -304,6 +439,8 @@ def init_stripe(app: Flask) -> None:
 
     if gateway.is_configured:
         app.logger.info("Stripe gateway initialised in %s mode", mode)
+        if not app.testing:
+            _start_price_warmup(app, gateway)
     elif secret_key:
         app.logger.warning(
             "Stripe secret key provided but price IDs missing; checkout disabled.",
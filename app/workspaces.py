@@ -1,20 +1,44 @@
 """Workspace access helpers."""
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Callable, List, Optional, TypeVar
 
+from flask import g, has_app_context
 from flask_login import UserMixin
+from sqlalchemy import case, false, or_, true
 
+from . import db
 from .models import Producer, Workspace
 
 
-def _membership_workspace_ids(user: UserMixin) -> set[int]:
+T = TypeVar("T")
+
+
+def _request_memo(name: str, user: UserMixin, compute: Callable[[UserMixin], T]) -> T:
+    """Memoise ``compute(user)`` on ``flask.g`` for the rest of the request."""
+    if not has_app_context():
+        return compute(user)
+    cache = g.setdefault(name, {})
+    # Include the role so a role change mid-request isn't served stale access.
+    key = (getattr(user, "id", None), getattr(user, "role", None))
+    if key not in cache:
+        cache[key] = compute(user)
+    return cache[key]
+
+
+def _load_membership_workspace_ids(user: UserMixin) -> frozenset[int]:
     memberships = getattr(user, "workspace_memberships", []) or []
-    return {
+    return frozenset(
         membership.workspace_id
         for membership in memberships
         if getattr(membership, "workspace_id", None)
-    }
+    )
+
+
+def _membership_workspace_ids(user: UserMixin) -> frozenset[int]:
+    # Memoised because a commit expires ``user.workspace_memberships`` and the
+    # next access would reload it; access checks run several times a request.
+    return _request_memo("_membership_workspace_ids", user, _load_membership_workspace_ids)
 
 
 def get_accessible_workspaces(user: UserMixin) -> List[Workspace]:
@@ -28,34 +52,27 @@ def get_accessible_workspaces(user: UserMixin) -> List[Workspace]:
         return base_query.order_by(Workspace.name.asc()).all()
 
     if user.role == "agent":
-        managed = base_query.filter_by(agent_id=user.id).all()
         membership_ids = _membership_workspace_ids(user)
+        criteria = Workspace.agent_id == user.id
         if membership_ids:
-            additional = (
-                base_query.filter(Workspace.id.in_(membership_ids))
-                .order_by(Workspace.name.asc())
-                .all()
-            )
-        else:
-            additional = []
-        combined = {ws.id: ws for ws in managed + additional if ws}
-        return list(combined.values())
+            criteria = or_(criteria, Workspace.id.in_(membership_ids))
+        # Managed workspaces stay first; uploads and the dashboard default to them.
+        return (
+            base_query.filter(criteria)
+            .order_by(case((Workspace.agent_id == user.id, 0), else_=1), Workspace.name.asc())
+            .all()
+        )
 
     if user.role == "producer" and user.producer:
-        workspaces = []
-        if user.producer.workspace:
-            workspaces.append(user.producer.workspace)
-        membership_ids = _membership_workspace_ids(user)
-        if membership_ids:
-            additional = (
-                base_query.filter(Workspace.id.in_(membership_ids))
-                .order_by(Workspace.name.asc())
-                .all()
-            )
-            for workspace in additional:
-                if workspace and workspace not in workspaces:
-                    workspaces.append(workspace)
-        return workspaces
+        own_workspace_id = user.producer.workspace_id
+        if not own_workspace_id and not _membership_workspace_ids(user):
+            return []
+        criteria = _workspace_access_criteria(user)
+        ordering = [Workspace.name.asc()]
+        if own_workspace_id:
+            # The producer's own workspace stays first; uploads default to it.
+            ordering.insert(0, case((Workspace.id == own_workspace_id, 0), else_=1))
+        return base_query.filter(criteria).order_by(*ordering).all()
 
     membership_ids = _membership_workspace_ids(user)
     if membership_ids:
@@ -74,20 +91,22 @@ def get_accessible_workspace_ids(user: UserMixin) -> List[int]:
 
 def find_workspace_for_upload(user: UserMixin, workspace_id: Optional[int]) -> Optional[Workspace]:
     """Resolve the workspace that should receive an upload for the given user."""
-    accessible = get_accessible_workspaces(user)
+    accessible = get_accessible_workspaces_cached(user)
+    by_id = {ws.id: ws for ws in accessible}
+    requested = by_id.get(workspace_id) if workspace_id else None
 
     if user.role in {"owner", "admin"}:
         if workspace_id is None:
             return accessible[0] if len(accessible) == 1 else None
-        return next((ws for ws in accessible if ws.id == workspace_id), None)
+        return by_id.get(workspace_id)
 
     if user.role in {"agent", "producer"}:
-        if workspace_id and any(ws.id == workspace_id for ws in accessible):
-            return next((ws for ws in accessible if ws.id == workspace_id), None)
+        if requested:
+            return requested
         return accessible[0] if accessible else None
 
-    if workspace_id and any(ws.id == workspace_id for ws in accessible):
-        return next((ws for ws in accessible if ws.id == workspace_id), None)
+    if requested:
+        return requested
     if len(accessible) == 1:
         return accessible[0]
 
@@ -105,17 +124,22 @@ def get_accessible_producers(user: UserMixin) -> List[Producer]:
         return query.order_by(Producer.display_name.asc()).all()
 
     if user.role == "agent":
-        workspace_ids = get_accessible_workspace_ids(user)
-        if workspace_ids:
-            query = query.filter(Producer.workspace_id.in_(workspace_ids))
-        else:
-            query = query.filter_by(agent_id=user.id)
-        return query.order_by(Producer.display_name.asc()).all()
+        # Join the access rules directly instead of fetching workspace IDs first.
+        producers = (
+            query.join(Workspace, Workspace.id == Producer.workspace_id)
+            .filter(Workspace.org_id == user.org_id, _workspace_access_criteria(user))
+            .order_by(Producer.display_name.asc())
+            .all()
+        )
+        if producers or get_accessible_workspace_ids_cached(user):
+            return producers
+        # Agents without any workspace still see producers assigned to them.
+        return query.filter_by(agent_id=user.id).order_by(Producer.display_name.asc()).all()
 
     if user.role == "producer" and user.producer:
         return [user.producer]
 
-    workspace_ids = get_accessible_workspace_ids(user)
+    workspace_ids = get_accessible_workspace_ids_cached(user)
     if workspace_ids:
         return (
             query.filter(Producer.workspace_id.in_(workspace_ids))
@@ -126,5 +150,64 @@ def get_accessible_producers(user: UserMixin) -> List[Producer]:
     return []
 
 
+def _workspace_access_criteria(user: UserMixin):
+    """Return the SQL criteria matching workspaces ``user`` may open."""
+    if user.role in {"owner", "admin"}:
+        return true()
+    if user.role == "agent":
+        criteria = Workspace.agent_id == user.id
+    elif user.role == "producer" and user.producer and user.producer.workspace_id:
+        criteria = Workspace.id == user.producer.workspace_id
+    else:
+        criteria = false()
+    membership_ids = _membership_workspace_ids(user)
+    if membership_ids:
+        criteria = or_(criteria, Workspace.id.in_(membership_ids))
+    return criteria
+
+
 def user_can_access_workspace(user: UserMixin, workspace_id: int) -> bool:
-    return any(ws.id == workspace_id for ws in get_accessible_workspaces(user))
+    if not workspace_id or not getattr(user, "is_authenticated", False):
+        return False
+    if not has_app_context():
+        return _workspace_exists(user, workspace_id)
+
+    # Reuse the accessible-workspace list when this request already loaded it.
+    user_key = (getattr(user, "id", None), getattr(user, "role", None))
+    cached_ids = g.get("_accessible_workspace_ids", {}).get(user_key)
+    if cached_ids is not None:
+        return workspace_id in cached_ids
+
+    cache = g.setdefault("_workspace_access", {})
+    key = (*user_key, workspace_id)
+    if key not in cache:
+        cache[key] = _workspace_exists(user, workspace_id)
+    return cache[key]
+
+
+def _workspace_exists(user: UserMixin, workspace_id: int) -> bool:
+    query = Workspace.query.filter(
+        Workspace.org_id == user.org_id,
+        Workspace.id == workspace_id,
+        _workspace_access_criteria(user),
+    )
+    return bool(db.session.query(query.exists()).scalar())
+
+
+def get_accessible_workspaces_cached(user: UserMixin) -> List[Workspace]:
+    """Request-scoped :func:`get_accessible_workspaces` for read-only views."""
+    return _request_memo("_accessible_workspaces", user, get_accessible_workspaces)
+
+
+def get_accessible_workspace_ids_cached(user: UserMixin) -> List[int]:
+    """Request-scoped :func:`get_accessible_workspace_ids` for read-only views."""
+    return _request_memo(
+        "_accessible_workspace_ids",
+        user,
+        lambda u: [ws.id for ws in get_accessible_workspaces_cached(u) if ws],
+    )
+
+
+def get_accessible_producers_cached(user: UserMixin) -> List[Producer]:
+    """Request-scoped :func:`get_accessible_producers` for read-only views."""
+    return _request_memo("_accessible_producers", user, get_accessible_producers)